@@ -1,4 +1,5 @@
 import os
+import atexit
 from flask import Flask
 from flask_cors import CORS, cross_origin
 from dotenv import load_dotenv
@@ -9,12 +10,24 @@ from routes.stream import stream
 from routes.users import users
 from routes.authentication import authentication
 from routes.healthz import healthz
+from utils.cache import ByteLRUCache, TTLCache
+from utils.catalog_cache import CatalogCache
+from utils.cgroup import cpu_limit, default_ffmpeg_threads, default_worker_count
+from utils.hls import DEFAULT_RENDITIONS, PACKAGINGS, parse_ladder
+from utils.job_queue import JobQueue
+from utils.job_watcher import JobWatcher
+from utils.json_provider import FastJSONProvider
+from utils.media_files import OFFLOAD_MODES
+from utils.scheduler import PlaybackMeter, Scheduler
+from utils.transcode_pool import TranscodePool
 
 # Load environment variables
 load_dotenv()
 
 # Flask app configuration
 app = Flask(__name__)
+# Same output as Flask's provider, encoded with orjson when it is installed
+app.json = FastJSONProvider(app)
 jwt = JWTManager(app)
 
 # CORS configuration
@@ -23,6 +36,81 @@ CORS(app, supports_credentials=True, origins=os.getenv('CORS_ORIGIN', 'http://lo
 # File upload configuration
 app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', '/code/uploads')
 app.config['ALLOWED_EXTENSIONS'] = {'mp4', 'avi', 'flv', 'mkv', 'mov', 'wmv', 'webm'}
+app.config['MAX_FILE_SIZE'] = int(os.getenv('MAX_FILE_SIZE', 2 * 1024 * 1024 * 1024))
+# Resumable uploads that are not finalized within this many seconds are forgotten
+app.config['UPLOAD_SESSION_TTL'] = int(os.getenv('UPLOAD_SESSION_TTL', 86400))
+
+# HLS output configuration
+app.config['HLS_SEGMENT_TIME'] = int(os.getenv('HLS_SEGMENT_TIME', 10))
+app.config['HLS_LIST_SIZE'] = int(os.getenv('HLS_LIST_SIZE', 0))
+app.config['HLS_SEGMENT_TYPE'] = os.getenv('HLS_SEGMENT_TYPE', 'fmp4')
+app.config['HLS_RENDITIONS'] = os.getenv('HLS_RENDITIONS', DEFAULT_RENDITIONS)
+# 'hls', or 'cmaf' for fMP4 segments shared by an HLS master playlist and a DASH manifest
+app.config['HLS_PACKAGING'] = os.getenv('HLS_PACKAGING', 'hls').lower()
+if app.config['HLS_PACKAGING'] not in PACKAGINGS:
+    raise ValueError(f"HLS_PACKAGING must be one of {PACKAGINGS}, got {app.config['HLS_PACKAGING']!r}")
+# One media file per rendition addressed with EXT-X-BYTERANGE instead of a file per segment
+app.config['HLS_SINGLE_FILE'] = os.getenv('HLS_SINGLE_FILE', 'false').lower() == 'true'
+# Publish EVENT playlists while transcoding; content turns Streamable once every rendition has HLS_STREAMABLE_SEGMENTS segments
+# Off with HLS_SINGLE_FILE: the growing media file would be served as an immutable segment
+app.config['HLS_PROGRESSIVE'] = os.getenv('HLS_PROGRESSIVE', 'true').lower() == 'true' and not app.config['HLS_SINGLE_FILE']
+app.config['HLS_STREAMABLE_SEGMENTS'] = int(os.getenv('HLS_STREAMABLE_SEGMENTS', 3))
+# Write .br/.gz variants of playlists when a transcode finishes
+app.config['HLS_PRECOMPRESS'] = os.getenv('HLS_PRECOMPRESS', 'true').lower() == 'true'
+# Copy H.264/AAC sources instead of re-encoding them
+app.config['HLS_PASSTHROUGH'] = os.getenv('HLS_PASSTHROUGH', 'true').lower() == 'true'
+# Typical full-ladder encode speed (x realtime), used to estimate the time saved by passthrough
+app.config['TRANSCODE_REFERENCE_SPEED'] = float(os.getenv('TRANSCODE_REFERENCE_SPEED', 1.0))
+
+# Seek-preview sprite sheets rendered from the transcode decode (interval 0 disables)
+app.config['TRICKPLAY_INTERVAL'] = int(os.getenv('TRICKPLAY_INTERVAL', 10))
+app.config['TRICKPLAY_WIDTH'] = int(os.getenv('TRICKPLAY_WIDTH', 160))
+app.config['TRICKPLAY_COLUMNS'] = int(os.getenv('TRICKPLAY_COLUMNS', 10))
+app.config['TRICKPLAY_ROWS'] = int(os.getenv('TRICKPLAY_ROWS', 10))
+
+# Stream serving: playlists get a short TTL, segments are cached as immutable
+app.config['STREAM_MANIFEST_MAX_AGE'] = int(os.getenv('STREAM_MANIFEST_MAX_AGE', 5))
+app.config['STREAM_SEGMENT_MAX_AGE'] = int(os.getenv('STREAM_SEGMENT_MAX_AGE', 31536000))
+# Let the web server send the bytes: '' (Flask), 'x-accel' (nginx) or 'x-sendfile' (Apache/lighttpd)
+app.config['STREAM_OFFLOAD'] = os.getenv('STREAM_OFFLOAD', '').lower()
+if app.config['STREAM_OFFLOAD'] not in OFFLOAD_MODES:
+    raise ValueError(f"STREAM_OFFLOAD must be one of {OFFLOAD_MODES}, got {app.config['STREAM_OFFLOAD']!r}")
+# nginx internal location that maps to UPLOAD_FOLDER, used with x-accel
+app.config['STREAM_OFFLOAD_PREFIX'] = os.getenv('STREAM_OFFLOAD_PREFIX', '/protected-media')
+# Signed playback URLs issued by the details and episode endpoints
+app.config['STREAM_SIGNING_KEY'] = os.getenv('STREAM_SIGNING_KEY') or os.getenv('JWT_SECRET_KEY', 'your-secret-key')
+app.config['STREAM_TOKEN_TTL'] = int(os.getenv('STREAM_TOKEN_TTL', 4 * 3600))
+# Reject unsigned /stream/<path> requests
+app.config['STREAM_REQUIRE_SIGNATURE'] = os.getenv('STREAM_REQUIRE_SIGNATURE', 'false').lower() == 'true'
+# In-process LRU cache of playlists and init segments (0 disables)
+app.config['STREAM_CACHE_BYTES'] = int(os.getenv('STREAM_CACHE_BYTES', 64 * 1024 * 1024))
+app.config['STREAM_CACHE_MAX_ITEM_BYTES'] = int(os.getenv('STREAM_CACHE_MAX_ITEM_BYTES', 1024 * 1024))
+app.config['STREAM_CACHE_REVALIDATE'] = float(os.getenv('STREAM_CACHE_REVALIDATE', 1.0))
+
+# Transcode pool configuration (jobs x encoders x ffmpeg threads is sized to the container CPU limit)
+app.config['TRANSCODE_CPUS'] = cpu_limit()
+# One job runs an x264 encoder per encoded rendition, each with its own -threads
+app.config['TRANSCODE_ENCODERS'] = max(1, len([r for r in parse_ladder(app.config['HLS_RENDITIONS']) if r['height']]))
+app.config['TRANSCODE_WORKERS'] = int(os.getenv('TRANSCODE_WORKERS', 0)) or default_worker_count(app.config['TRANSCODE_CPUS'])
+app.config['FFMPEG_THREADS'] = int(os.getenv('FFMPEG_THREADS', 0)) or default_ffmpeg_threads(
+    app.config['TRANSCODE_CPUS'],
+    app.config['TRANSCODE_WORKERS'],
+    app.config['TRANSCODE_ENCODERS']
+)
+# Long sources are split at keyframes and their chunks encoded in parallel (0 disables)
+app.config['HLS_CHUNKED_MIN_DURATION'] = int(os.getenv('HLS_CHUNKED_MIN_DURATION', 1800))
+app.config['HLS_CHUNK_SECONDS'] = int(os.getenv('HLS_CHUNK_SECONDS', 300))
+app.config['TRANSCODE_CHUNK_WORKERS'] = int(os.getenv('TRANSCODE_CHUNK_WORKERS', 0)) or app.config['TRANSCODE_WORKERS']
+app.config['TRANSCODE_MAX_BACKLOG'] = int(os.getenv('TRANSCODE_MAX_BACKLOG', 100))
+app.config['TRANSCODE_LEASE_SECONDS'] = int(os.getenv('TRANSCODE_LEASE_SECONDS', 60))
+app.config['TRANSCODE_MAX_ATTEMPTS'] = int(os.getenv('TRANSCODE_MAX_ATTEMPTS', 3))
+# Pause backfill transcodes while the cluster serves more segment requests per second than this (0 disables)
+app.config['TRANSCODE_BACKFILL_PAUSE_RPS'] = float(os.getenv('TRANSCODE_BACKFILL_PAUSE_RPS', 0))
+# Transcode progress endpoints (/process/<uuid>/await and /events)
+app.config['PROCESS_POLL_INTERVAL'] = float(os.getenv('PROCESS_POLL_INTERVAL', 1.0))
+app.config['PROCESS_AWAIT_MAX_TIMEOUT'] = int(os.getenv('PROCESS_AWAIT_MAX_TIMEOUT', 300))
+# Set to false on API replicas when transcoding runs in dedicated worker.py pods
+app.config['TRANSCODE_WORKER_ENABLED'] = os.getenv('TRANSCODE_WORKER_ENABLED', 'true').lower() == 'true'
 
 # JWT configuration
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'your-secret-key')
@@ -38,6 +126,46 @@ app.config['JWT_BLOCKLIST_TOKEN_CHECKS'] = ['access', 'refresh']
 conn = Connection()
 app.config['db'] = conn.get_db()
 
+app.config['stream_cache'] = ByteLRUCache(
+    app.config['STREAM_CACHE_BYTES'],
+    app.config['STREAM_CACHE_MAX_ITEM_BYTES'],
+    app.config['STREAM_CACHE_REVALIDATE']
+) if app.config['STREAM_CACHE_BYTES'] else None
+
+# Per-type totals of /<type>/list?include_total=true
+app.config['CATALOG_COUNT_TTL'] = int(os.getenv('CATALOG_COUNT_TTL', 60))
+app.config['catalog_counts'] = TTLCache(app.config['CATALOG_COUNT_TTL'])
+# Read cache of rendered catalog responses, invalidated on writes across replicas (TTL 0 disables)
+app.config['CATALOG_CACHE_TTL'] = int(os.getenv('CATALOG_CACHE_TTL', 60))
+app.config['CATALOG_CACHE_CHECK_INTERVAL'] = float(os.getenv('CATALOG_CACHE_CHECK_INTERVAL', 1.0))
+# Also clear the cache from a change stream on catalog (needs a replica set)
+app.config['CATALOG_CACHE_WATCH'] = os.getenv('CATALOG_CACHE_WATCH', 'false').lower() == 'true'
+app.config['catalog_cache'] = CatalogCache(
+    app.config['db'],
+    app.config['CATALOG_CACHE_TTL'],
+    app.config['CATALOG_CACHE_CHECK_INTERVAL']
+) if app.config['CATALOG_CACHE_TTL'] else None
+if app.config['catalog_cache'] is not None and app.config['CATALOG_CACHE_WATCH']:
+    app.config['catalog_cache'].watch()
+
+# Transcode worker pool backed by the durable transcode_jobs queue
+job_queue = JobQueue(app.config['db'], app.config['TRANSCODE_LEASE_SECONDS'], app.config['TRANSCODE_MAX_ATTEMPTS'])
+# The budget always fits TRANSCODE_WORKERS jobs: x264 threads at 1 per encoder rarely keep a core busy each
+scheduler = Scheduler(
+    app.config['db'],
+    max(app.config['TRANSCODE_CPUS'], app.config['TRANSCODE_WORKERS'] * app.config['FFMPEG_THREADS'] * app.config['TRANSCODE_ENCODERS']),
+    app.config['FFMPEG_THREADS'],
+    app.config['TRANSCODE_BACKFILL_PAUSE_RPS'],
+    encoders=app.config['TRANSCODE_ENCODERS']
+)
+transcode_pool = TranscodePool(job_queue, app.config['TRANSCODE_WORKERS'], app.config['TRANSCODE_MAX_BACKLOG'], scheduler=scheduler)
+app.config['transcode_pool'] = transcode_pool
+# One poller per process feeds every /process/<uuid>/await and /events connection
+app.config['job_watcher'] = JobWatcher(job_queue, app.config['PROCESS_POLL_INTERVAL'])
+app.config['playback_meter'] = PlaybackMeter(app.config['db'])
+# Like worker.py: stop ffmpeg and release running jobs to the queue instead of waiting for them
+atexit.register(transcode_pool.shutdown, wait=False, timeout=10)
+
 # Register blueprints
 app.register_blueprint(stream)
 app.register_blueprint(users)
@@ -45,6 +173,9 @@ app.register_blueprint(authentication)
 app.register_blueprint(viewers)
 app.register_blueprint(healthz)
 
+if app.config['TRANSCODE_WORKER_ENABLED']:
+    transcode_pool.start()
+
 @app.after_request
 def after_request(response):
     response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
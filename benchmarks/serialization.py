@@ -0,0 +1,111 @@
+"""
+Compare model validation plus Flask's JSON provider with the trusted-read
+fast path plus ``FastJSONProvider`` on synthetic catalog and user documents,
+rendered with ``json_body`` like the catalog routes.
+No database is needed::
+
+    python -m benchmarks.serialization --titles 1000 --episodes 20
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from bson.objectid import ObjectId
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from models.catalog_model import StreamContent
+from models.user_model import User
+from utils.json_provider import FastJSONProvider, json_body, orjson
+
+def catalog_documents(titles: int, episodes: int):
+    created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    documents = []
+    for index in range(titles):
+        document = {
+            '_id': ObjectId(),
+            'uuid': str(uuid4()),
+            'title': f'Title {index}',
+            'type': 'tvshow' if index % 2 else 'movie',
+            'release_year': 1990 + index % 35,
+            'genre': ['Drama', 'Sci-Fi'],
+            'rating': 5 + index % 5 * 0.9,
+            'description': 'A description of the title. ' * 8,
+            'cast': ['First Actor', 'Second Actor', 'Third Actor'],
+            'status': 'Ready',
+            'duration_seconds': 5400.25,
+            'media': {'duration_seconds': 5400.25, 'video_codec': 'h264', 'width': 1920, 'height': 1080, 'frame_rate': 23.976},
+            'manifests': {'hls': f'videos/{index}/master.m3u8'},
+            'file_path': f'videos/{index}/master.m3u8',
+            'created_at': created_at + timedelta(minutes=index),
+            'updated_at': created_at + timedelta(minutes=index),
+        }
+        if index % 2:
+            document['seasons'] = [{
+                'season_number': season,
+                'episodes': [{
+                    'episode_number': episode,
+                    'title': f'Episode {episode}',
+                    'duration_seconds': 2700.5,
+                    'file_path': f'videos/{index}/S{season:02}/E{episode:02}/master.m3u8',
+                    'status': 'Ready',
+                    'manifests': {'hls': f'videos/{index}/S{season:02}/E{episode:02}/master.m3u8'},
+                } for episode in range(1, episodes + 1)]
+            } for season in (1, 2)]
+        documents.append(document)
+    return documents
+
+def user_documents(count: int):
+    return [{
+        '_id': ObjectId(),
+        'uuid': str(uuid4()),
+        'username': f'user{index}',
+        'password': 'hashed',
+        'email': f'user{index}@example.com',
+        'privileges': ['read', 'write'],
+        'role': 'admin',
+        'createdAt': datetime(2024, 1, 1),
+    } for index in range(count)]
+
+def best_of(repeat: int, run):
+    best, output = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+def compare(name, repeat, documents, validated, fast, default_provider, fast_provider):
+    baseline_time, baseline = best_of(repeat, lambda: json_body(default_provider, [validated(document) for document in documents]))
+    fast_time, output = best_of(repeat, lambda: json_body(fast_provider, [fast(document) for document in documents]))
+    if output != baseline:
+        raise SystemExit(f'{name}: fast path output differs from the validated output')
+    print(f'{name:<10} {len(documents):>7} {baseline_time * 1000:>12.1f} {fast_time * 1000:>10.1f} {baseline_time / fast_time:>8.1f}x  {len(baseline):>10}')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.serialization', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--episodes', type=int, default=20, help='episodes per season of every show (2 seasons)')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    app = Flask(__name__)
+    default_provider, fast_provider = DefaultJSONProvider(app), FastJSONProvider(app)
+    print(f"orjson: {'yes' if orjson is not None else 'no, stdlib encoder only'}")
+    print(f"{'endpoint':<10} {'docs':>7} {'validated ms':>12} {'fast ms':>10} {'speedup':>9}  {'bytes':>10}")
+    compare(
+        'catalog', args.repeat, catalog_documents(args.titles, args.episodes),
+        lambda document: StreamContent(**document).to_json(), StreamContent.json_from_bson,
+        default_provider, fast_provider
+    )
+    compare(
+        'users', args.repeat, user_documents(args.users),
+        lambda document: User(**document).to_json(), User.json_from_bson,
+        default_provider, fast_provider
+    )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+import sys
+import logging
+import argparse
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure
+
+from utils.search import SEARCH_WEIGHTS
+
+logger = logging.getLogger(__name__)
+
+class IndexSpec(NamedTuple):
+    collection: str
+    keys: List[Tuple[str, int]]
+    options: Dict[str, Any] = {}
+
+    @property
+    def name(self) -> str:
+        return '_'.join(f'{key}_{direction}' for key, direction in self.keys)
+
+# Every index the API relies on. Applied at deploy time with
+# ``python -m connection.indexes apply``; names follow MongoDB's defaults.
+INDEXES = [
+    IndexSpec('users', [('username', ASCENDING)], {'unique': True}),
+    IndexSpec('viewers', [('uuid', ASCENDING)]),
+    IndexSpec('viewers', [('user_uuid', ASCENDING)]),
+    IndexSpec('token_blacklist', [('jti', ASCENDING)]),
+    IndexSpec('token_blacklist', [('expires_at', ASCENDING)], {'expireAfterSeconds': 0}),
+    IndexSpec('catalog', [('uuid', ASCENDING)]),
+    IndexSpec('catalog', [('type', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)]),
+    IndexSpec('catalog', [(field, TEXT) for field in SEARCH_WEIGHTS], {'weights': SEARCH_WEIGHTS}),
+    IndexSpec('catalog', [('genre', ASCENDING), ('release_year', DESCENDING)]),
+    IndexSpec('episodes', [('content_uuid', ASCENDING), ('season_number', ASCENDING), ('episode_number', ASCENDING)], {'unique': True}),
+    IndexSpec('upload_sessions', [('uuid', ASCENDING)]),
+    IndexSpec('upload_sessions', [('expires_at', ASCENDING)], {'expireAfterSeconds': 0}),
+    IndexSpec('upload_sessions', [('video_path', ASCENDING), ('status', ASCENDING)], {'unique': True, 'partialFilterExpression': {'status': 'open'}}),
+    IndexSpec('transcode_jobs', [('uuid', ASCENDING)], {'unique': True}),
+    IndexSpec('transcode_jobs', [('status', ASCENDING), ('available_at', ASCENDING), ('created_at', ASCENDING)]),
+    IndexSpec('transcode_jobs', [('status', ASCENDING), ('lease_expires_at', ASCENDING)]),
+    IndexSpec('transcode_jobs', [('content_uuid', ASCENDING)]),
+    IndexSpec('transcode_jobs', [('status', ASCENDING), ('finished_at', ASCENDING)]),
+    IndexSpec('transcode_jobs', [('status', ASCENDING), ('priority', ASCENDING), ('owner', ASCENDING), ('available_at', ASCENDING), ('created_at', ASCENDING)]),
+    IndexSpec('playback_load', [('updated_at', ASCENDING)]),
+]
+
+class CanonicalQuery(NamedTuple):
+    label: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: List[Tuple[str, int]] = []
+    # Stages after ``{'$match': filter}`` for a query run as an aggregation
+    pipeline: Optional[List[Dict[str, Any]]] = None
+
+def canonical_queries() -> List[CanonicalQuery]:
+    """
+    The query shape behind each route and background task, with placeholder
+    values. ``GET /v1/api/videos/list`` without ``view=cards`` returns the
+    whole collection on purpose and is not listed.
+    """
+    now = datetime.now(timezone.utc)
+    return [
+        CanonicalQuery('auth login/register', 'users', {'username': 'audit'}),
+        CanonicalQuery('auth check, users by id', 'users', {'_id': ObjectId()}),
+        CanonicalQuery('jwt blocklist check', 'token_blacklist', {'jti': 'audit'}),
+        CanonicalQuery('viewers list', 'viewers', {'user_uuid': 'audit'}),
+        CanonicalQuery('viewers by uuid', 'viewers', {'uuid': 'audit'}),
+        CanonicalQuery('catalog by uuid', 'catalog', {'uuid': 'audit'}),
+        CanonicalQuery('season episodes', 'episodes', {'content_uuid': 'audit', 'season_number': 1}, [('episode_number', ASCENDING)]),
+        CanonicalQuery('episode sync cleanup', 'episodes', {'content_uuid': 'audit', '$nor': [{'season_number': 1, 'episode_number': 1}]}),
+        CanonicalQuery('catalog cards', 'catalog', {'_id': {'$lt': ObjectId()}}, [('_id', DESCENDING)]),
+        CanonicalQuery('catalog by type', 'catalog', {'type': 'movie'}, [('created_at', DESCENDING), ('_id', DESCENDING)]),
+        CanonicalQuery('catalog by type, next page', 'catalog', {
+            'type': 'movie',
+            '$or': [{'created_at': {'$lt': now}}, {'created_at': now, '_id': {'$lt': ObjectId()}}],
+        }, [('created_at', DESCENDING), ('_id', DESCENDING)]),
+        CanonicalQuery('catalog search', 'catalog', {'$text': {'$search': 'audit'}, 'genre': {'$in': ['Drama']}}),
+        CanonicalQuery('catalog search filters', 'catalog', {'genre': {'$in': ['Drama']}, 'release_year': {'$in': [2020]}}),
+        CanonicalQuery('upload session', 'upload_sessions', {'uuid': 'audit'}),
+        CanonicalQuery('upload target check', 'upload_sessions', {'video_path': 'audit', 'status': 'open', 'expires_at': {'$gt': now}}),
+        CanonicalQuery('job claim', 'transcode_jobs', {
+            'status': 'queued', 'available_at': {'$lte': now}, 'priority': 'interactive', 'owner': 'audit',
+        }, [('available_at', ASCENDING), ('created_at', ASCENDING)]),
+        CanonicalQuery('job claim, any priority', 'transcode_jobs', {
+            'status': 'queued', 'available_at': {'$lte': now},
+        }, [('available_at', ASCENDING), ('created_at', ASCENDING)]),
+        CanonicalQuery('job claim, waiting owners', 'transcode_jobs', {
+            'status': 'queued', 'priority': 'interactive', 'available_at': {'$lte': now},
+        }, pipeline=[{'$group': {'_id': '$owner', 'oldest': {'$min': '$created_at'}}}]),
+        CanonicalQuery('job claim, running per owner', 'transcode_jobs', {
+            'status': 'running', 'owner': {'$in': ['audit']},
+        }, pipeline=[{'$group': {'_id': '$owner', 'count': {'$sum': 1}}}]),
+        CanonicalQuery('job backlog', 'transcode_jobs', {'status': 'queued', 'priority': 'backfill'}),
+        CanonicalQuery('job history', 'transcode_jobs', {'$or': [{'content_uuid': 'audit'}, {'uuid': 'audit'}]}, [('created_at', ASCENDING)]),
+        CanonicalQuery('job lease reaper', 'transcode_jobs', {'status': 'running', 'lease_expires_at': {'$lt': now}}),
+        CanonicalQuery('job cleanup', 'transcode_jobs', {'status': {'$in': ['completed', 'failed']}, 'finished_at': {'$lt': now}}),
+        CanonicalQuery('playback load', 'playback_load', {'updated_at': {'$gte': now}}),
+    ]
+
+def _same_keys(existing: Dict[str, Any], spec: IndexSpec) -> bool:
+    if any(direction == TEXT for _, direction in spec.keys):
+        # Text indexes are stored as _fts/_ftsx keys with the fields in their weights
+        return set(existing.get('weights', {})) == {key for key, direction in spec.keys if direction == TEXT}
+    return [tuple(key) for key in existing['key']] == [tuple(key) for key in spec.keys]
+
+def apply_indexes(db, indexes: List[IndexSpec] = INDEXES) -> Dict[str, List[str]]:
+    """
+    Create the indexes that are missing. Existing indexes are never dropped
+    or rebuilt; one whose keys or options differ from the registry is
+    reported as a conflict to be fixed by hand.
+
+    Returns:
+        Dict[str, List[str]]: ``collection.index`` names, grouped as
+        ``created``, ``existing`` and ``conflicts``.
+    """
+    result = {'created': [], 'existing': [], 'conflicts': []}
+    current = {}
+    for spec in indexes:
+        label = f'{spec.collection}.{spec.name}'
+        if spec.collection not in current:
+            current[spec.collection] = db[spec.collection].index_information()
+        existing = current[spec.collection].get(spec.name)
+        if existing is not None:
+            same_keys = _same_keys(existing, spec)
+            same_options = all(existing.get(option) == value for option, value in spec.options.items())
+            result['existing' if same_keys and same_options else 'conflicts'].append(label)
+            continue
+        try:
+            db[spec.collection].create_index(spec.keys, name=spec.name, **spec.options)
+            result['created'].append(label)
+        except OperationFailure as e:
+            logger.error(f'Unable to create {label}: {str(e)}')
+            result['conflicts'].append(label)
+    return result
+
+def _winning_plans(explain) -> List[Dict[str, Any]]:
+    """Every ``winningPlan`` in an explain result; an aggregation nests them in its stages"""
+    if isinstance(explain, list):
+        return [plan for item in explain for plan in _winning_plans(item)]
+    if not isinstance(explain, dict):
+        return []
+    if 'winningPlan' in explain:
+        return [explain['winningPlan']]
+    return [plan for value in explain.values() for plan in _winning_plans(value)]
+
+def _explain(db, query: CanonicalQuery) -> Dict[str, Any]:
+    if query.pipeline is not None:
+        return db.command('explain', {
+            'aggregate': query.collection,
+            'pipeline': [{'$match': query.filter}, *query.pipeline],
+            'cursor': {},
+        }, verbosity='queryPlanner')
+    cursor = db[query.collection].find(query.filter)
+    if query.sort:
+        cursor = cursor.sort(query.sort)
+    return cursor.explain()
+
+def _stages(plan) -> List[str]:
+    if isinstance(plan, list):
+        return [stage for item in plan for stage in _stages(item)]
+    if not isinstance(plan, dict):
+        return []
+    stages = [plan['stage']] if 'stage' in plan else []
+    for value in plan.values():
+        if isinstance(value, (dict, list)):
+            stages.extend(_stages(value))
+    return stages
+
+def audit_queries(db, queries: List[CanonicalQuery] = None) -> List[Dict[str, Any]]:
+    """
+    Explain every canonical query (or aggregation) and list the stages of
+    its winning plan. Run it after ``apply``: on a missing collection every plan is ``EOF``.
+
+    Returns:
+        List[Dict[str, Any]]: One ``{label, collection, stages, collscan}``
+        entry per query.
+    """
+    report = []
+    for query in queries or canonical_queries():
+        stages = _stages(_winning_plans(_explain(db, query)))
+        report.append({
+            'label': query.label,
+            'collection': query.collection,
+            'stages': stages,
+            'collscan': 'COLLSCAN' in stages,
+        })
+    return report
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m connection.indexes', description='Manage MongoDB indexes')
+    parser.add_argument('command', choices=['apply', 'audit'])
+    args = parser.parse_args(argv)
+
+    from connection.connection import Connection
+    conn = Connection()
+    try:
+        db = conn.get_db()
+        if args.command == 'apply':
+            result = apply_indexes(db)
+            for status, labels in result.items():
+                for label in labels:
+                    logger.info(f'{status}: {label}')
+            return 1 if result['conflicts'] else 0
+
+        report = audit_queries(db)
+        for entry in report:
+            level = logging.ERROR if entry['collscan'] else logging.INFO
+            logger.log(level, f"{entry['label']} ({entry['collection']}): {' > '.join(entry['stages'])}")
+        failed = [entry['label'] for entry in report if entry['collscan']]
+        if failed:
+            logger.error(f"Collection scans in: {', '.join(failed)}")
+            return 1
+        return 0
+    finally:
+        conn.closeConnection()
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+    sys.exit(main())
@@ -1,9 +1,34 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 from uuid import uuid4
 from models.objectid import PydanticObjectId
+from models.serialization import dump_document
 from datetime import datetime, timezone
 
+# Fields needed to render a catalog card, for projected listings
+CARD_FIELDS = ['uuid', 'title', 'type', 'release_year', 'genre', 'rating', 'status', 'duration_seconds', 'created_at']
+
+class MediaInfo(BaseModel):
+    duration_seconds: Optional[float] = None
+    format_name: Optional[str] = None
+    bit_rate: Optional[int] = None
+    video_codec: Optional[str] = None
+    video_profile: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    frame_rate: Optional[float] = None
+    audio_codec: Optional[str] = None
+    audio_channels: Optional[int] = None
+
+class TrickplayInfo(BaseModel):
+    vtt_path: str
+    interval: int
+    width: int
+    height: int
+    columns: int
+    rows: int
+    sheets: int
+
 class Episodes(BaseModel):
     episode_number: int
     title: Optional[str] = None
@@ -13,6 +38,9 @@ class Episodes(BaseModel):
     duration_seconds: Optional[float] = None
     file_path: Optional[str] = None
     status: Optional[str] = None
+    media: Optional[MediaInfo] = None
+    trickplay: Optional[TrickplayInfo] = None
+    manifests: Optional[Dict[str, str]] = None
 
 class Seasons(BaseModel):
     season_number: int
@@ -35,12 +63,20 @@ class StreamContent(BaseModel):
     intro_end_time: Optional[str] = None
     file_path: Optional[str] = None
     status: Optional[str] = None
+    media: Optional[MediaInfo] = None
+    trickplay: Optional[TrickplayInfo] = None
+    manifests: Optional[Dict[str, str]] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
     def to_json(self):
         data = self.model_dump()
         return data
+
+    @classmethod
+    def json_from_bson(cls, document):
+        """``StreamContent(**document).to_json()`` of a document read from the database, without validating it again"""
+        return dump_document(cls, document)
     
     def to_bson(self):
         data = self.model_dump(by_alias=True, exclude_none=True)
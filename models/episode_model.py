@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+from models.catalog_model import TrickplayInfo
+from models.objectid import PydanticObjectId
+
+# Fields of the show copied onto each of its episodes
+SHOW_FIELDS = ['title', 'release_year', 'genre', 'rating']
+
+class ShowInfo(BaseModel):
+    title: str
+    release_year: Optional[int] = None
+    genre: Optional[List[str]] = None
+    rating: Optional[float] = None
+
+class EpisodeEntry(BaseModel):
+    """
+    One episode of a show in the ``episodes`` collection, denormalized from
+    the show's ``seasons`` array so a season page is one range scan on
+    ``(content_uuid, season_number, episode_number)``.
+    """
+    id: Optional[PydanticObjectId] = Field(None, alias='_id')
+    content_uuid: str
+    season_number: int
+    episode_number: int
+    show: ShowInfo
+    title: Optional[str] = None
+    intro_start_time: Optional[str] = None
+    intro_end_time: Optional[str] = None
+    next_episode_time: Optional[str] = None
+    duration_seconds: Optional[float] = None
+    file_path: Optional[str] = None
+    status: Optional[str] = None
+    trickplay: Optional[TrickplayInfo] = None
+    manifests: Optional[Dict[str, str]] = None
+    updated_at: Optional[datetime] = None
+
+    def to_json(self):
+        """The episode as the player expects it, titled after the show"""
+        data = self.model_dump(exclude={'id', 'content_uuid', 'episode_number', 'show', 'title', 'updated_at'}, exclude_none=True)
+        data.update(self.show.model_dump(exclude_none=True))
+        data.update(uuid=self.content_uuid, type='video', episode=self.episode_number)
+        if self.title is not None:
+            data['episode_title'] = self.title
+        return data
+
+    def to_bson(self):
+        data = self.model_dump(by_alias=True, exclude_none=True)
+        if data.get("_id") is None:
+            data.pop("_id", None)
+        if data.get("updated_at") is None:
+            data["updated_at"] = datetime.now(timezone.utc)
+        return data
@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from uuid import uuid4
+from pydantic import BaseModel, Field
+
+from models.objectid import PydanticObjectId
+
+class TranscodeJob(BaseModel):
+    id: Optional[PydanticObjectId] = Field(None, alias='_id')
+    uuid: Optional[str] = Field(default_factory=lambda: str(uuid4()), alias='uuid')
+    kind: str = 'transcode'
+    content_uuid: str
+    season_number: Optional[int] = None
+    episode_number: Optional[int] = None
+    priority: str = 'interactive'
+    owner: Optional[str] = None
+    payload: Dict[str, Any] = {}
+    status: str = 'queued'
+    attempts: int = 0
+    max_attempts: int = 3
+    worker_id: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    available_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    progress: Optional[Dict[str, Any]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    def to_json(self):
+        data = self.model_dump()
+        return data
+
+    def to_bson(self):
+        data = self.model_dump(by_alias=True, exclude_none=True)
+        if data.get("_id") is None:
+            data.pop("_id", None)
+        now = datetime.now(timezone.utc)
+        if data.get("created_at") is None:
+            data["created_at"] = now
+        if data.get("updated_at") is None:
+            data["updated_at"] = now
+        if data.get("available_at") is None:
+            data["available_at"] = now
+        return data
@@ -0,0 +1,133 @@
+import typing
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from bson.objectid import ObjectId
+from pydantic import BaseModel
+
+# Compiled dumpers by model class; None when a model has a field type the
+# fast path does not know, so it is always validated
+_dumpers: Dict[type, Optional[Callable[[Dict[str, Any]], Dict[str, Any]]]] = {}
+
+_MISSING = object()
+
+class _Fallback(Exception):
+    pass
+
+def _identity(value):
+    return value
+
+def _to_float(value):
+    if type(value) is float:
+        return value
+    if type(value) is int:
+        return float(value)
+    # e.g. raw ffprobe output such as '5400.200000' stored by older versions
+    raise _Fallback()
+
+def _to_int(value):
+    if type(value) is int:
+        return value
+    if type(value) is float and value.is_integer():
+        return int(value)
+    raise _Fallback()
+
+def _to_str(value):
+    return str(value) if isinstance(value, ObjectId) else value
+
+def _list_of(convert):
+    if convert is _identity:
+        return _identity
+
+    def dump(value):
+        return [convert(item) for item in value] if value is not None else None
+    return dump
+
+def _optional(convert):
+    if convert is _identity:
+        return _identity
+
+    def dump(value):
+        return convert(value) if value is not None else None
+    return dump
+
+def _converter(annotation) -> Callable[[Any], Any]:
+    """How a stored value of ``annotation`` is dumped, or _Fallback if unknown"""
+    origin, args = typing.get_origin(annotation), typing.get_args(annotation)
+    if origin is typing.Union:
+        values = [arg for arg in args if arg is not type(None)]
+        if len(values) != 1:
+            raise _Fallback()
+        return _optional(_converter(values[0]))
+    if origin is list:
+        return _list_of(_converter(args[0])) if args else _identity
+    if origin is dict:
+        if args and _converter(args[1]) is not _identity:
+            raise _Fallback()
+        return _identity
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            dumper = _compile(annotation)
+            if dumper is None:
+                raise _Fallback()
+            return dumper
+        if issubclass(annotation, ObjectId):
+            return _to_str
+        if annotation is float:
+            return _to_float
+        if annotation is int:
+            return _to_int
+        if annotation in (str, bool, datetime, list, dict):
+            return _identity
+    if annotation is Any:
+        return _identity
+    raise _Fallback()
+
+def _compile(model: type) -> Optional[Callable[[Dict[str, Any]], Dict[str, Any]]]:
+    if model in _dumpers:
+        return _dumpers[model]
+    plan = []
+    try:
+        for name, field in model.model_fields.items():
+            convert = _converter(field.annotation)
+            plan.append((name, field.alias or name, field.is_required(), field, None if convert is _identity else convert))
+    except _Fallback:
+        _dumpers[model] = None
+        return None
+
+    def dump(document):
+        if isinstance(document, BaseModel):
+            raise _Fallback()
+        data = {}
+        for name, key, required, field, convert in plan:
+            value = document.get(key, _MISSING)
+            if value is _MISSING:
+                if required:
+                    raise _Fallback()
+                data[name] = field.get_default(call_default_factory=True)
+            else:
+                data[name] = value if convert is None else convert(value)
+        return data
+
+    _dumpers[model] = dump
+    return dump
+
+def dump_document(model: type, document: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Same dict as ``model(**document).model_dump()`` for a document read
+    from MongoDB, built without validating it. Only the conversions
+    validation makes to well-typed values (ObjectId to str, int to float)
+    are applied. A document with a missing required field or a number
+    stored as anything else (older episodes hold ffprobe's duration string)
+    goes through the model, which coerces or raises as before.
+    """
+    dumper = _compile(model)
+    if dumper is not None:
+        try:
+            return dumper(document)
+        except _Fallback:
+            pass
+    return model(**document).model_dump()
+
+def dump_documents(model: type, documents: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [dump_document(model, document) for document in documents]
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from uuid import uuid4
+from pydantic import BaseModel, Field
+
+from models.objectid import PydanticObjectId
+from models.serialization import dump_document
+
+class UploadSession(BaseModel):
+    id: Optional[PydanticObjectId] = Field(None, alias='_id')
+    uuid: Optional[str] = Field(default_factory=lambda: str(uuid4()), alias='uuid')
+    filename: str
+    type: str
+    metadata: Optional[Dict[str, Any]] = None
+    size: int
+    checksum: Optional[str] = None
+    offset: int = 0
+    status: str = 'open'
+    part_path: str
+    video_path: str
+    video_output_path: str
+    user_uuid: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+    def to_json(self):
+        data = self.model_dump(exclude={'part_path'})
+        return data
+
+    @classmethod
+    def json_from_bson(cls, document):
+        """``UploadSession(**document).to_json()`` of a document read from the database, without validating it again"""
+        data = dump_document(cls, document)
+        data.pop('part_path', None)
+        return data
+
+    def to_bson(self, ttl_seconds: int = 86400):
+        data = self.model_dump(by_alias=True, exclude_none=True)
+        if data.get("_id") is None:
+            data.pop("_id", None)
+        now = datetime.now(timezone.utc)
+        if data.get("created_at") is None:
+            data["created_at"] = now
+        if data.get("updated_at") is None:
+            data["updated_at"] = now
+        if data.get("expires_at") is None:
+            data["expires_at"] = now + timedelta(seconds=ttl_seconds)
+        return data
@@ -4,6 +4,7 @@ from uuid import uuid4
 from pydantic import BaseModel, Field
 
 from models.objectid import PydanticObjectId
+from models.serialization import dump_document
 
 class Address(BaseModel):
     street: str
@@ -32,6 +33,13 @@ class User(BaseModel):
     def to_json(self):
         self.password = '*********'
         return self.model_dump()
+
+    @classmethod
+    def json_from_bson(cls, document):
+        """``User(**document).to_json()`` of a document read from the database, without validating it again"""
+        data = dump_document(cls, document)
+        data['password'] = '*********'
+        return data
     
     def to_bson(self):
         data = self.model_dump(by_alias=True, exclude_none=True)
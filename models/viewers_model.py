@@ -4,6 +4,7 @@ from uuid import uuid4
 from pydantic import BaseModel, Field
 
 from models.objectid import PydanticObjectId
+from models.serialization import dump_document
 
 class Viewer(BaseModel):
     id: Optional[PydanticObjectId] = Field(None, alias='_id')
@@ -20,6 +21,11 @@ class Viewer(BaseModel):
     def to_json(self):
         data = self.model_dump()
         return data
+
+    @classmethod
+    def json_from_bson(cls, document):
+        """``Viewer(**document).to_json()`` of a document read from the database, without validating it again"""
+        return dump_document(cls, document)
     
     def to_bson(self):
         data = self.model_dump(by_alias=True, exclude_none=True)
@@ -102,7 +102,7 @@ def check_auth():
         user_id = get_jwt_identity()
         user = db.users.find_one({'_id': PydanticObjectId(user_id)})
         if user:
-            return {'status': 'success', 'authenticated': True, 'user': User(**user).to_json()}, 200
+            return {'status': 'success', 'authenticated': True, 'user': User.json_from_bson(user)}, 200
         return {'status': 'failed', 'authenticated': False, 'msg': 'User not found'}, 401
     except Exception as e:
         return {'status': 'failed', 'authenticated': False, 'msg': 'Invalid token'}, 401
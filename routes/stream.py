@@ -1,38 +1,74 @@
 import asyncio.tasks
 from collections import defaultdict
 import asyncio
-import threading
 from uuid import uuid4
-from flask import Blueprint, jsonify, request, send_file, current_app
-from flask_jwt_extended import jwt_required
+from flask import Blueprint, Response, g, jsonify, redirect, request, send_from_directory, current_app, stream_with_context
+from flask_jwt_extended import get_jwt, jwt_required
 from werkzeug.utils import secure_filename
 from pathlib import Path
 from ffmpeg import _ffmpeg as ffmpeg
-from ffmpeg import probe as ffprobe
 from connection.connection import Connection
 from flask_cors import cross_origin
-from multiprocessing import Process
+from pymongo.errors import DuplicateKeyError
 import os
 import json
+import time
+from datetime import datetime, timezone
+from urllib.parse import quote
 from typing import List, Dict, Any
 import logging
 
-from models.catalog_model import StreamContent
+from models.catalog_model import CARD_FIELDS, StreamContent
+from models.episode_model import SHOW_FIELDS
+from models.job_model import TranscodeJob
+from models.upload_model import UploadSession
 from connection.connection import Connection
+from utils.chunked import transcode_chunked
+from utils.episodes import add_catalog_episode, has_episodes, season_episodes, sync_episodes, update_episode, upsert_episode
+from utils.ffmpeg_runner import ensure_active, run_ffmpeg
+from utils.media_files import MEDIA_TYPES, cache_control, is_hot, is_manifest, media_type, relative_media_path, resolve_media_path
+from utils.hls import DASH_MANIFEST, DEFAULT_RENDITIONS, MASTER_PLAYLIST, build_cmaf_command, build_hls_command, parse_ladder, select_renditions, source_rendition, streamable_callback, write_master_playlist
+from utils.json_provider import compact_dumps, json_body
+from utils.pagination import decode_cursor, encode_cursor, keyset_filter, page_size, stream_json_page, stream_ndjson_page
+from utils.precompress import precompress_manifests, precompressed_variant
+from utils.progress import ProgressTracker
+from utils.scheduler import DEFAULT_PRIORITY, PRIORITY_CLASSES
+from utils.search import RECENT_SORT, RELEVANCE_SORT, search_facets, search_match, search_pipeline
+from utils.signing import sign_scope, verify_scope
+from utils.trickplay import TRICKPLAY_DIR, trickplay_settings, trickplay_spans, write_trickplay_vtt
+from utils.probe import first_stream, media_summary, plan_transcode, probe_media
+from utils.uploads import UploadLimitError, UploadOffsetError, append_chunk, file_checksum, parse_checksum
 
 stream = Blueprint('stream', __name__)
 logger = logging.getLogger(__name__)
+_worker_connection = None
+_catalog_cache = None
+_transcode_pool = None
 
-ffmpeg_queue = []
-queue_processor_running = False
-queue_lock = threading.Lock()
+@stream.record_once
+def _register_job_handlers(state):
+    global _catalog_cache, _transcode_pool
+    _catalog_cache = state.app.config.get('catalog_cache')
+    _transcode_pool = state.app.config['transcode_pool']
+    _transcode_pool.register('transcode', _run_transcode_job, on_failure=_on_transcode_failed, on_complete=_on_transcode_complete)
+
+def _catalog_cached(key, render):
+    """Rendered catalog response from the catalog cache, or ``render()`` when caching is off"""
+    if _catalog_cache is None:
+        return render()
+    return _catalog_cache.get_or_set(key, render)
+
+def _invalidate_catalog():
+    """Call after every catalog write, on this replica and (through the version) all others"""
+    if _catalog_cache is not None:
+        _catalog_cache.invalidate()
 
 def _allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
 def _validate_upload_request(request):
-    if 'file' not in request.files:
+    if 'file' not in request.files and 'upload_id' not in request.form:
         return {'status': 'failed', 'message': 'No file part in the request'}, 400
     if 'type' not in request.form:
         return {'status': 'failed', 'message': 'Type parameter is required'}, 400
@@ -84,52 +120,123 @@ def _create_upload_path(base_path, video_type, subdirs, filename):
         # For movies, include filename in the directory structure
         return _create_upload_directory(base_path, *subdirs, filename)
 
-def _get_video_duration(video_path: str) -> float:
+def _prepare_upload_paths(filename, video_type, metadata=None):
     """
-    Get the duration of a video file using ffprobe.
-    Args:
-        video_path (str): Path to the video file.
-    Returns:
-        float: Duration of the video in seconds.
+    Create the upload directory for a source file.
+    Returns: (video_path, video_output_path) or (None, error)
     """
-    try:
-        duration = ffprobe(video_path)["format"]["duration"]
-        return duration
-    except Exception as e:
-        current_app.logger.error(f'Error getting video duration: {str(e)}')
-        return 0.0
+    if not _allowed_file(filename):
+        return None, ({'status': 'failed', 'message': 'File type not allowed'}, 400)
+
+    # Get upload structure based on video type and metadata
+    subdirs_or_error = _get_upload_structure(video_type, metadata) if metadata else []
+    if isinstance(subdirs_or_error, tuple):
+        return None, subdirs_or_error
+
+    # Create upload directory
+    full_filename = secure_filename(filename)
+    stem = Path(full_filename).stem
+    upload_path = _create_upload_path(
+        current_app.config['UPLOAD_FOLDER'],
+        video_type,
+        subdirs_or_error,
+        stem
+    )
+    # Define paths
+    video_path = os.path.join(upload_path, full_filename)
+    video_output_path = os.path.join(upload_path, MASTER_PLAYLIST)
+    return video_path, video_output_path
+
+def _upload_target_taken(db, video_path, video_output_path):
+    """
+    True when an open upload that has not expired, a source file waiting for
+    or in conversion, or a converted title already uses these paths. A
+    finalized upload is covered by its source file.
+    """
+    if os.path.exists(video_path) or os.path.exists(video_output_path):
+        return True
+    return db.upload_sessions.find_one(
+        {'video_path': video_path, 'status': 'open', 'expires_at': {'$gt': datetime.now(timezone.utc)}},
+        {'_id': 1}
+    ) is not None
+
+def _queue_transcode(uuid, video_path, video_output_path, metadata=None):
+    """
+    Queue the HLS conversion of a saved source file. Probing and the
+    thumbnail happen in the job, so the request returns once the bytes are on disk.
+    The job is submitted by ``_submit_pending_jobs`` once the catalog entry exists.
+    It runs in the request's ``priority`` class and is owned by the uploader.
+    """
+    # Get HLS config
+    hls_config = {
+        'hls_segment_time': current_app.config.get('HLS_SEGMENT_TIME', 10),
+        'hls_list_size': current_app.config.get('HLS_LIST_SIZE', 0),
+        'hls_segment_type': current_app.config.get('HLS_SEGMENT_TYPE', 'fmp4'),
+        'ladder': parse_ladder(current_app.config.get('HLS_RENDITIONS', DEFAULT_RENDITIONS)),
+    }
+
+    g.setdefault('pending_jobs', []).append(TranscodeJob(
+        content_uuid=uuid,
+        season_number=metadata['season'] if metadata else None,
+        episode_number=metadata['episode'] if metadata else None,
+        priority=request.form.get('priority', DEFAULT_PRIORITY),
+        owner=get_jwt().get('user_uuid'),
+        payload={
+            'video_path': video_path,
+            'video_output_path': video_output_path,
+            'hls_segment_time': hls_config['hls_segment_time'],
+            'hls_list_size': hls_config['hls_list_size'],
+            'hls_segment_type': hls_config['hls_segment_type'],
+            'ladder': hls_config['ladder'],
+            'threads': current_app.config['FFMPEG_THREADS'],
+            'passthrough': current_app.config['HLS_PASSTHROUGH'],
+            'reference_speed': current_app.config['TRANSCODE_REFERENCE_SPEED'],
+            'chunked_min_duration': current_app.config['HLS_CHUNKED_MIN_DURATION'],
+            'chunk_seconds': current_app.config['HLS_CHUNK_SECONDS'],
+            'chunk_workers': current_app.config['TRANSCODE_CHUNK_WORKERS'],
+            'precompress': current_app.config['HLS_PRECOMPRESS'],
+            'single_file': current_app.config['HLS_SINGLE_FILE'],
+            'progressive': current_app.config['HLS_PROGRESSIVE'],
+            'packaging': current_app.config['HLS_PACKAGING'],
+            'streamable_segments': current_app.config['HLS_STREAMABLE_SEGMENTS'],
+            'trickplay': {
+                'interval': current_app.config['TRICKPLAY_INTERVAL'],
+                'width': current_app.config['TRICKPLAY_WIDTH'],
+                'columns': current_app.config['TRICKPLAY_COLUMNS'],
+                'rows': current_app.config['TRICKPLAY_ROWS'],
+            },
+        }
+    ))
+
+def _validate_priority(request):
+    priority = request.form.get('priority', DEFAULT_PRIORITY)
+    if priority not in PRIORITY_CLASSES:
+        return {'status': 'failed', 'message': f"Invalid priority, expected one of {', '.join(PRIORITY_CLASSES)}"}, 400
+    return None
+
+def _submit_pending_jobs():
+    """Submit the transcode jobs queued during this request"""
+    pool = current_app.config['transcode_pool']
+    for job in g.pop('pending_jobs', []):
+        # Capacity was checked before the upload was accepted
+        pool.submit(job, check_backlog=False)
 
 def _add_to_ffmpeg_queue(uuid, file, video_type, metadata=None):
     """
     Add a video file to the FFmpeg conversion queue
     Returns: (video_path, video_output_path)
     """
+    pool = current_app.config['transcode_pool']
     try:
         # Validate file
+        if pool.is_full():
+            return None, ({'status': 'failed', 'message': 'Transcode queue is full, try again later'}, 503)
         if file.filename == '':
-            return None, {'status': 'failed', 'message': 'No selected file'}, 400
-        if not _allowed_file(file.filename):
-            return None, {'status': 'failed', 'message': 'File type not allowed'}, 400
-        if file.content_length > current_app.config.get('MAX_FILE_SIZE', 2 * 1024 * 1024 * 1024):
-            return None, {'status': 'failed', 'message': 'File size exceeds maximum allowed'}, 400
-
-        # Get upload structure based on video type and metadata
-        subdirs_or_error = _get_upload_structure(video_type, metadata) if metadata else []
-        if isinstance(subdirs_or_error, tuple):
-            return None, subdirs_or_error
-
-        # Create upload directory
-        full_filename = secure_filename(file.filename)
-        filename = Path(full_filename).stem
-        upload_path = _create_upload_path(
-            current_app.config['UPLOAD_FOLDER'],
-            video_type,
-            subdirs_or_error,
-            filename
-        )
-        # Define paths
-        video_path = os.path.join(upload_path, full_filename)
-        video_output_path = os.path.join(upload_path, filename + '.m3u8')
+            return None, ({'status': 'failed', 'message': 'No selected file'}, 400)
+
+        video_path, video_output_path = _prepare_upload_paths(file.filename, video_type, metadata)
+        if video_path is None:
+            return None, video_output_path
 
         # Skip if output already exists
         if os.path.exists(video_output_path):
@@ -137,101 +244,266 @@ def _add_to_ffmpeg_queue(uuid, file, video_type, metadata=None):
 
         # Save original file
         file.save(video_path)
+        # Multipart parts rarely carry a Content-Length, so check what was actually written
+        if os.path.getsize(video_path) > current_app.config['MAX_FILE_SIZE']:
+            os.remove(video_path)
+            return None, ({'status': 'failed', 'message': 'File size exceeds maximum allowed'}, 413)
 
-        # Generate thumbnail
-        thumbnail_path = os.path.join(upload_path, 'thumbnail.jpg')
-        _generate_thumbnail(video_path, thumbnail_path)
-
-        # Get HLS config
-        hls_config = {
-            'hls_segment_time': current_app.config.get('HLS_SEGMENT_TIME', 10),
-            'hls_list_size': current_app.config.get('HLS_LIST_SIZE', 0),
-            'hls_segment_type': current_app.config.get('HLS_SEGMENT_TYPE', 'fmp4')
-        }
-
-        ffmpeg_queue.append(Process(target=_convert_video_to_hls, args=(
-            uuid, 
-            video_path, 
-            video_output_path, 
-            hls_config['hls_segment_time'], 
-            hls_config['hls_list_size'], 
-            hls_config['hls_segment_type'])
-        ))
-        
-        # Start queue processor if not already running
-        _start_queue_processor()
-        
+        _queue_transcode(uuid, video_path, video_output_path, metadata)
         return video_path, video_output_path
 
     except Exception as e:
         current_app.logger.error(f'Queue error: {str(e)}')
-        if 'video_path' in locals() and os.path.exists(video_path):
+        if 'video_path' in locals() and video_path and os.path.exists(video_path):
             os.remove(video_path)
         return None, None
 
-def _convert_video_to_hls(uuid, video_path, video_output_path, hls_segment_time=10, hls_list_size=0, hls_segment_type='fmp4'):
-    """Convert video to HLS format with improved error handling and logging"""
-    print("starting conversion for ", uuid)
+def _get_upload_sources(request):
+    """Multipart files, or the ids of finalized resumable uploads"""
+    return request.files.getlist('file') or request.form.getlist('upload_id')
+
+def _queue_source(uuid, source, video_type, metadata=None):
+    if isinstance(source, str):
+        return _add_upload_to_ffmpeg_queue(uuid, source)
+    return _add_to_ffmpeg_queue(uuid, source, video_type, metadata)
+
+def _add_upload_to_ffmpeg_queue(uuid, upload_id):
+    """
+    Add a finalized resumable upload to the FFmpeg conversion queue
+    Returns: (video_path, video_output_path)
+    """
+    db = current_app.config['db']
     try:
-        # Create temporary directory for segments
-        hls_params = {
-            'format': 'hls',
-            'acodec': 'copy',
-            'vcodec': 'libx264',
-            'start_number': 0,
-            'hls_time': hls_segment_time,
-            'hls_list_size': hls_list_size,
-            'hls_segment_type': hls_segment_type,
-            'hls_flags': 'independent_segments',
-        }
-        # Run conversion
-        (
-            ffmpeg.input(video_path)
-            .output(video_output_path, **hls_params)
-            .run(capture_stdout=True, capture_stderr=True)
-        )
-        _update_status(uuid)
-        return True
+        if current_app.config['transcode_pool'].is_full():
+            return None, ({'status': 'failed', 'message': 'Transcode queue is full, try again later'}, 503)
+        session = db.upload_sessions.find_one({'uuid': upload_id})
+        if session is None:
+            return None, ({'status': 'failed', 'message': f'Upload {upload_id} not found'}, 404)
+        if session['status'] != 'complete':
+            return None, ({'status': 'failed', 'message': f'Upload {upload_id} is not finalized'}, 409)
+        if os.path.exists(session['video_output_path']):
+            return None, session['video_output_path']
+
+        _queue_transcode(uuid, session['video_path'], session['video_output_path'], session.get('metadata'))
+        db.upload_sessions.update_one({'uuid': upload_id}, {'$set': {'status': 'queued', 'updated_at': datetime.now(timezone.utc)}})
+        return session['video_path'], session['video_output_path']
+
     except Exception as e:
-        print(e)
-        return False
-    finally:
-        # Print finish message
-        print("finish conversion")
-        # Clean up the original video file after conversion
-        if os.path.exists(video_path):
-            os.remove(video_path)
-            print(f"Deleted original video file: {video_path}")
-
-def _start_queue_processor():
-    """Start the queue processor if not already running"""
-    global queue_processor_running
-    with queue_lock:
-        if not queue_processor_running:
-            queue_processor_running = True
-            thread = threading.Thread(target=_process_queue_worker, daemon=True)
-            thread.start()
-
-def _process_queue_worker():
-    """Worker thread that processes one item at a time from the queue"""
-    global queue_processor_running
-    
-    while True:
-        process = None
-        
-        # Get next process from queue
-        with queue_lock:
-            if ffmpeg_queue:
-                process = ffmpeg_queue.pop(0)
-            else:
-                # No more items in queue, stop the worker
-                queue_processor_running = False
-                break
-        
-        if process:
-            # Process one item at a time
-            process.start()
-            process.join()  # Wait for this process to complete before starting the next one
+        current_app.logger.error(f'Queue error: {str(e)}')
+        return None, None
+
+def _convert_video_to_hls(uuid, video_path, video_output_path, hls_segment_time=10, hls_list_size=0, hls_segment_type='fmp4', threads=0, ladder=None, passthrough=True, reference_speed=1.0, chunked_min_duration=0, chunk_seconds=300, chunk_workers=1, probe=None, tracker=None, nice=0, trickplay=None, precompress=True, single_file=False, progressive=False, streamable_segments=3, on_streamable=None, packaging='hls', reserve_chunk_workers=None):
+    """
+    Convert video to an adaptive-bitrate HLS ladder in a single decode pass.
+
+    Every rendition is written to its own playlist next to ``video_output_path``,
+    which becomes the master playlist. A single ffprobe decides whether the
+    source video and audio can be copied instead of re-encoded. Sources that
+    need a full encode and are longer than ``chunked_min_duration`` seconds
+    are split at keyframes and encoded in parallel chunks, unless
+    ``single_file`` asks for one byte-range addressed file per rendition.
+    With ``trickplay`` settings the same decode also renders seek-preview
+    sprite sheets and a WebVTT thumbnail track. Playlists are precompressed
+    once at the end when ``precompress`` is set. Raises on failure so the
+    job can be retried.
+
+    With ``progressive`` (single-pass only) the master playlist is written up
+    front, the variants are EVENT playlists that grow while ffmpeg runs, and
+    ``on_streamable`` is called once each has ``streamable_segments`` segments.
+
+    With ``packaging='cmaf'`` one set of fMP4 segments is written with both a
+    DASH ``manifest.mpd`` and an HLS ``master.m3u8`` (single pass, no chunks).
+
+    ``reserve_chunk_workers`` is called with ``chunk_workers`` before a
+    chunked encode and returns how many chunks may run in parallel.
+
+    Returns:
+        Dict[str, Any]: The copy/encode decision and timing, stored on the job.
+    """
+    print("starting conversion for ", uuid)
+    started = time.monotonic()
+    output_dir = os.path.dirname(video_output_path)
+    probe = probe or probe_media(video_path)
+    plan = plan_transcode(probe, passthrough)
+    video_stream = first_stream(probe, 'video')
+    ladder = ladder or parse_ladder(DEFAULT_RENDITIONS)
+    renditions = select_renditions(
+        ladder,
+        int(video_stream['width']),
+        int(video_stream['height']),
+        plan['audio'] is not None,
+        source_rendition(probe, plan['audio'], ladder) if plan['video'] == 'copy' else None
+    )
+    cmaf = packaging == 'cmaf'
+    if not cmaf:
+        for rendition in renditions:
+            os.makedirs(os.path.join(output_dir, rendition['name']), exist_ok=True)
+    trickplay = trickplay_settings(
+        source_width=int(video_stream['width']),
+        source_height=int(video_stream['height']),
+        **trickplay
+    ) if trickplay else None
+    if trickplay:
+        os.makedirs(os.path.join(output_dir, TRICKPLAY_DIR), exist_ok=True)
+
+    duration = float(probe['format'].get('duration', 0))
+    audio_codec = 'copy' if plan['audio'] == 'copy' else 'aac'
+    chunks = []
+    manifests = {'hls': video_output_path}
+    # Run conversion
+    if cmaf:
+        run_ffmpeg(build_cmaf_command(
+            video_path,
+            output_dir,
+            renditions,
+            hls_segment_time,
+            threads,
+            audio_codec,
+            trickplay
+        ), tracker.callback() if tracker else None, nice)
+        manifests['dash'] = os.path.join(output_dir, DASH_MANIFEST)
+    elif chunked_min_duration and duration >= chunked_min_duration and plan['mode'] == 'encode' and hls_segment_type == 'fmp4' and not single_file:
+        if reserve_chunk_workers is not None:
+            chunk_workers = reserve_chunk_workers(chunk_workers)
+        on_chunk = None
+        if progressive:
+            write_master_playlist(output_dir, renditions, hls_segment_type)
+            if on_streamable is not None:
+                on_chunk = streamable_callback(output_dir, renditions, streamable_segments, on_streamable)
+        chunks = transcode_chunked(
+            video_path,
+            output_dir,
+            renditions,
+            chunk_seconds,
+            chunk_workers,
+            hls_segment_time,
+            threads,
+            audio_codec,
+            tracker,
+            nice,
+            trickplay,
+            progressive,
+            on_chunk
+        )
+    else:
+        on_progress = tracker.callback() if tracker else None
+        if progressive:
+            write_master_playlist(output_dir, renditions, hls_segment_type)
+            if on_streamable is not None:
+                on_progress = streamable_callback(output_dir, renditions, streamable_segments, on_streamable, on_progress)
+        run_ffmpeg(build_hls_command(
+            video_path,
+            output_dir,
+            renditions,
+            hls_segment_time,
+            # EVENT playlists keep every segment
+            0 if progressive else hls_list_size,
+            hls_segment_type,
+            threads,
+            audio_codec,
+            trickplay,
+            single_file,
+            progressive
+        ), on_progress, nice)
+    if not cmaf:
+        # ffmpeg's dash muxer writes the CMAF master playlist itself
+        write_master_playlist(output_dir, renditions, hls_segment_type)
+    if trickplay:
+        trickplay = write_trickplay_vtt(output_dir, trickplay, chunks or trickplay_spans(output_dir, duration))
+    if precompress:
+        precompress_manifests(output_dir)
+    elapsed = time.monotonic() - started
+    print("finish conversion")
+    # Nothing is written to the catalog once the job's lease was lost
+    ensure_active()
+    _update_status(uuid)
+
+    return {
+        'decision': plan,
+        'renditions': [r['name'] for r in renditions],
+        'chunks': len(chunks),
+        'manifests': manifests,
+        'trickplay': trickplay,
+        'duration_seconds': duration,
+        'elapsed_seconds': round(elapsed, 2),
+        'speed': round(duration / elapsed, 2) if elapsed else None,
+        # Compared with encoding every rendition at the reference speed
+        'estimated_saved_seconds': round(max(0.0, duration / reference_speed - elapsed), 2) if plan['mode'] != 'encode' else 0.0,
+    }
+
+def _run_transcode_job(job: Dict[str, Any], report_progress) -> Dict[str, Any]:
+    """
+    Job handler for the transcode pool: probe the source once, store the
+    media details on the catalog entry, extract the thumbnail and convert
+    while publishing progress on the job. The scheduler's allocation, if
+    any, overrides the thread count; a chunked encode grows it to run its
+    chunks in parallel, single-pass jobs keep one process.
+    """
+    payload = dict(job['payload'])
+    allocation = job.get('allocation')
+    if allocation:
+        payload.update(threads=allocation['threads'], nice=allocation['nice'])
+    probe = probe_media(payload['video_path'])
+    media = media_summary(probe)
+    _update_content_fields(
+        job['content_uuid'],
+        {'duration_seconds': media['duration_seconds'], 'media': media},
+        job.get('season_number'),
+        job.get('episode_number')
+    )
+    thumbnail_path = os.path.join(os.path.dirname(payload['video_output_path']), 'thumbnail.jpg')
+    _generate_thumbnail(payload['video_path'], thumbnail_path)
+
+    tracker = ProgressTracker(media['duration_seconds'] or 0.0, report_progress)
+    result = _convert_video_to_hls(
+        job['content_uuid'],
+        probe=probe,
+        tracker=tracker,
+        on_streamable=lambda: _mark_streamable(job),
+        reserve_chunk_workers=lambda wanted: _transcode_pool.expand(job, wanted),
+        **payload
+    )
+    fields = {'manifests': result['manifests']}
+    if result['trickplay']:
+        fields['trickplay'] = result['trickplay']
+    if job.get('episode_number') is not None:
+        fields['status'] = 'Ready'
+    ensure_active()
+    _update_content_fields(job['content_uuid'], fields, job.get('season_number'), job.get('episode_number'))
+    result['video_output_path'] = payload['video_output_path']
+    result['media'] = media
+    return result
+
+def _mark_streamable(job: Dict[str, Any]):
+    """The first segments of every rendition are out; players can start while the rest is encoded"""
+    ensure_active()
+    logger.info(f"Content {job['content_uuid']} is streamable")
+    if job.get('episode_number') is not None:
+        _update_content_fields(job['content_uuid'], {'status': 'Streamable'}, job.get('season_number'), job.get('episode_number'))
+    _update_status(job['content_uuid'], 'Streamable', unless=['Ready'])
+
+def _on_transcode_complete(job: Dict[str, Any], result: Dict[str, Any]):
+    """
+    Clean up the original video file once the job is marked completed. Until
+    then a worker that dies is retried from the lease, and the retry needs
+    the source.
+    """
+    video_path = job['payload']['video_path']
+    if os.path.exists(video_path):
+        os.remove(video_path)
+        print(f"Deleted original video file: {video_path}")
+
+def _on_transcode_failed(job: Dict[str, Any]):
+    """
+    Mark the content as failed once its transcode job has no attempts left.
+    A failed episode does not take down a show that already plays.
+    """
+    logger.error(f"Transcode job {job['uuid']} for content {job['content_uuid']} failed: {job.get('error')}")
+    if job.get('episode_number') is not None:
+        _update_content_fields(job['content_uuid'], {'status': 'Failed'}, job.get('season_number'), job.get('episode_number'))
+        _update_status(job['content_uuid'], 'Failed', unless=['Ready', 'Streamable'])
+    else:
+        _update_status(job['content_uuid'], 'Failed')
 
 def _get_season_episodes(seasons: List[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
     """
@@ -267,26 +539,57 @@ def _get_season_episodes(seasons: List[Dict[str, Any]]) -> Dict[int, List[Dict[s
     
     return episodes
 
-def _update_status(content_id: str) -> bool:
+def _get_worker_db():
+    """Database handle shared by the transcode workers of this process"""
+    global _worker_connection
+    if _worker_connection is None:
+        _worker_connection = Connection()
+    return _worker_connection.get_db()
+
+def _update_content_fields(content_id: str, fields: Dict[str, Any], season: int = None, episode: int = None) -> bool:
     """
-    Update the status of a content item to "Ready" in the database.
+    Set fields on a movie, or on one episode of a show (and its entry in
+    ``episodes``) when ``season`` and ``episode`` are given.
+    """
+    db = _get_worker_db()
+    try:
+        if season is None or episode is None:
+            result = db.catalog.update_one({'uuid': content_id}, {'$set': fields})
+        else:
+            result = db.catalog.update_one(
+                {'uuid': content_id},
+                {'$set': {f'seasons.$[s].episodes.$[e].{key}': value for key, value in fields.items()}},
+                array_filters=[{'s.season_number': season}, {'e.episode_number': episode}]
+            )
+            update_episode(db, content_id, season, episode, fields)
+        _invalidate_catalog()
+        return result.matched_count > 0
+    except Exception as e:
+        logger.error(f'Error updating content {content_id}: {str(e)}')
+        return False
+
+def _update_status(content_id: str, status: str = 'Ready', unless: List[str] = None) -> bool:
+    """
+    Update the status of a content item in the database.
     
     Args:
         content_id (str): The UUID of the content to update
+        status (str): The new status, "Ready" by default
+        unless (List[str]): Leave the status alone if it is one of these,
+            e.g. a show that is already Ready stays Ready
         
     Returns:
         bool: True if update was successful, False otherwise
     """
-    from connection.connection import Connection
-    db = Connection().get_db()
+    db = _get_worker_db()
     try:
-        result = db.catalog.update_one(
-            {'uuid': content_id},
-            {'$set': {'status': 'Ready'}}
-        )
-        
+        query = {'uuid': content_id}
+        if unless:
+            query['status'] = {'$nin': unless}
+        result = db.catalog.update_one(query, {'$set': {'status': status}})
         if result.modified_count > 0:
-            logger.info(f'Successfully updated status to Ready for content {content_id}')
+            _invalidate_catalog()
+            logger.info(f'Successfully updated status to {status} for content {content_id}')
             return True
         else:
             logger.warning(f'No content found with ID {content_id} to update status')
@@ -294,63 +597,463 @@ def _update_status(content_id: str) -> bool:
     except Exception as e:
         logger.error(f'Error updating status for content {content_id}: {str(e)}')
         return False
-    finally:
-        Connection().closeConnection()
+
+def _process_status(uuid: str, jobs: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Summarise the transcode jobs of a content item (or a single job). The
+    jobs are read from the queue unless already given.
+
+    Returns:
+        Dict[str, Any]: ``process_status`` is ``queued``, ``running``,
+        ``completed``, ``failed`` or ``not_found``; ``progress`` is the
+        average percent done over all jobs.
+    """
+    if jobs is None:
+        jobs = current_app.config['transcode_pool'].jobs.find(uuid)
+    statuses = {job['status'] for job in jobs}
+    if not jobs:
+        process_status = 'not_found'
+    elif 'running' in statuses:
+        process_status = 'running'
+    elif 'queued' in statuses:
+        process_status = 'queued'
+    elif 'failed' in statuses:
+        process_status = 'failed'
+    else:
+        process_status = 'completed'
+    percents = [(job.get('progress') or {}).get('percent') or (100.0 if job['status'] == 'completed' else 0.0) for job in jobs]
+    return {
+        'uuid': uuid,
+        'process_status': process_status,
+        'progress': round(sum(percents) / len(percents), 1) if percents else None,
+        'jobs': [
+            {
+                'uuid': job['uuid'],
+                'status': job['status'],
+                'season_number': job.get('season_number'),
+                'episode_number': job.get('episode_number'),
+                'attempts': job.get('attempts'),
+                'progress': job.get('progress'),
+                'error': job.get('error'),
+                'result': job.get('result'),
+            }
+            for job in jobs
+        ],
+    }
+
+def _is_finished(status: Dict[str, Any]) -> bool:
+    return status['process_status'] in ('completed', 'failed', 'not_found')
+
+@stream.route('/v1/api/videos/process/<string:uuid>/status', methods=['GET'])
+def process_status(uuid):
+    try:
+        return jsonify({'status': 'success', **_process_status(uuid)}), 200
+    except Exception as e:
+        current_app.logger.error(f'Error reading process status: {str(e)}')
+        return {'status': 'failed', 'message': 'Internal server error'}, 500
+
+@stream.route('/v1/api/videos/process/<string:uuid>/await', methods=['POST'])
+def await_process(uuid):
+    """Long-poll until the transcode finishes or ``timeout`` seconds pass"""
+    try:
+        raw_data = request.get_json(silent=True) or {}
+        timeout = min(float(raw_data.get('timeout', 30)), current_app.config['PROCESS_AWAIT_MAX_TIMEOUT'])
+        watcher = current_app.config['job_watcher']
+        deadline = time.monotonic() + timeout
+        status = _process_status(uuid)
+        version = 0
+        with watcher.watching(uuid):
+            while not _is_finished(status) and time.monotonic() < deadline:
+                version, jobs = watcher.wait(uuid, version, deadline - time.monotonic())
+                if jobs is not None:
+                    status = _process_status(uuid, jobs)
+        return jsonify({'status': 'success', 'timed_out': not _is_finished(status), **status}), 200
+    except ValueError:
+        return {'status': 'failed', 'message': 'Invalid timeout'}, 400
+    except Exception as e:
+        current_app.logger.error(f'Error awaiting process: {str(e)}')
+        return {'status': 'failed', 'message': 'Internal server error'}, 500
+
+@stream.route('/v1/api/videos/process/<string:uuid>/events', methods=['GET'])
+def process_events(uuid):
+    """Server-sent events with the transcode status, sent whenever it changes"""
+    watcher = current_app.config['job_watcher']
+    max_duration = current_app.config['PROCESS_AWAIT_MAX_TIMEOUT']
+
+    def events():
+        deadline = time.monotonic() + max_duration
+        last = None
+        last_sent = time.monotonic()
+        status = _process_status(uuid)
+        version = 0
+        with watcher.watching(uuid):
+            while True:
+                data = json.dumps(status, default=str)
+                if data != last:
+                    yield f'event: progress\ndata: {data}\n\n'
+                    last = data
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent > 15:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ': keep-alive\n\n'
+                    last_sent = time.monotonic()
+                if _is_finished(status):
+                    yield f'event: done\ndata: {data}\n\n'
+                    return
+                if time.monotonic() >= deadline:
+                    return
+                # Wake up at least every 15 seconds for the keep-alive
+                version, jobs = watcher.wait(uuid, version, min(15, deadline - time.monotonic()))
+                if jobs is not None:
+                    status = _process_status(uuid, jobs)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@stream.route('/v1/api/videos/queue/info', methods=['GET'])
+def queue_info():
+    try:
+        pool = current_app.config['transcode_pool']
+        return jsonify({'status': 'success', 'pool': pool.info(), 'jobs': pool.jobs.counts()}), 200
+    except Exception as e:
+        current_app.logger.error(f'Error reading queue info: {str(e)}')
+        return {'status': 'failed', 'message': 'Internal server error'}, 500
+
+@stream.route('/v1/api/videos/queue/start', methods=['POST'])
+@jwt_required()
+def queue_start():
+    current_app.config['transcode_pool'].start()
+    return {'status': 'success', 'message': 'Queue processor running'}, 200
+
+@stream.route('/v1/api/videos/queue/backfill', methods=['POST'])
+@jwt_required()
+def queue_backfill():
+    """Pause or resume backfill transcodes on every worker"""
+    raw_data = request.get_json(silent=True) or {}
+    if not isinstance(raw_data.get('paused'), bool):
+        return {'status': 'failed', 'message': 'paused must be a boolean'}, 400
+    try:
+        scheduler = current_app.config['transcode_pool'].scheduler
+        scheduler.set_backfill_paused(raw_data['paused'])
+        return {'status': 'success', 'scheduler': scheduler.status()}, 200
+    except Exception as e:
+        current_app.logger.error(f'Error updating backfill state: {str(e)}')
+        return {'status': 'failed', 'message': 'Internal server error'}, 500
+
+@stream.route('/v1/api/videos/queue/cleanup', methods=['POST'])
+@jwt_required()
+def queue_cleanup():
+    """Delete finished jobs older than ``older_than`` seconds (default one hour)"""
+    try:
+        raw_data = request.get_json(silent=True) or {}
+        deleted = current_app.config['transcode_pool'].jobs.cleanup(int(raw_data.get('older_than', 3600)))
+        return {'status': 'success', 'deleted': deleted}, 200
+    except ValueError:
+        return {'status': 'failed', 'message': 'Invalid older_than'}, 400
+    except Exception as e:
+        current_app.logger.error(f'Error cleaning up queue: {str(e)}')
+        return {'status': 'failed', 'message': 'Internal server error'}, 500
+
+def _serve_media(filename, token=None):
+    """
+    Serve playlists, segments and previews from the upload folder with their
+    own content type, ETag/Last-Modified validators and byte ranges. When a
+    playback ``token`` is given the file must be inside its signed scope.
+
+    With ``STREAM_OFFLOAD`` set, only the headers are produced here and nginx
+    (``X-Accel-Redirect``) or Apache/lighttpd (``X-Sendfile``) sends the bytes.
+    Otherwise playlists and init segments are served from the in-process
+    ``stream_cache``, and manifests from their ``.br``/``.gz`` variant when
+    the client accepts one.
+    """
+    root = current_app.config['UPLOAD_FOLDER']
+    relative_path = resolve_media_path(root, filename)
+    if relative_path is None:
+        return {'status': 'failed', 'message': 'File not found'}, 404
+    if token is not None and not verify_scope(current_app.config['STREAM_SIGNING_KEY'], token, relative_path):
+        return {'status': 'failed', 'message': 'Invalid or expired playback token'}, 403
+    mimetype = media_type(relative_path)
+    if mimetype is None:
+        return {'status': 'failed', 'message': 'File not found'}, 404
+    if not is_manifest(relative_path):
+        current_app.config['playback_meter'].record()
+
+    offload = current_app.config['STREAM_OFFLOAD']
+    if offload == 'x-accel':
+        response = Response(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = quote(f"{current_app.config['STREAM_OFFLOAD_PREFIX'].rstrip('/')}/{relative_path}")
+    elif offload == 'x-sendfile':
+        response = Response(mimetype=mimetype)
+        response.headers['X-Sendfile'] = os.path.join(os.path.realpath(root), relative_path)
+    else:
+        encoding, serve_path = None, relative_path
+        if is_manifest(relative_path):
+            variant = precompressed_variant(os.path.join(root, relative_path), request.headers.get('Accept-Encoding', ''))
+            if variant is not None:
+                encoding, serve_path = variant[0], os.path.relpath(variant[1], root)
+        cache = current_app.config['stream_cache']
+        cached = cache.get(os.path.join(root, serve_path)) if cache is not None and is_hot(relative_path) else None
+        if cached is not None:
+            response = Response(cached.data, mimetype=mimetype)
+            response.set_etag(cached.etag)
+            response.last_modified = cached.mtime
+            response.make_conditional(request, accept_ranges=True, complete_length=cached.size)
+        else:
+            # conditional=True answers If-None-Match/If-Modified-Since with 304 and Range with 206
+            response = send_from_directory(root, serve_path, mimetype=mimetype, conditional=True, etag=True)
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+    if is_manifest(relative_path):
+        response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = cache_control(
+        relative_path,
+        current_app.config['STREAM_MANIFEST_MAX_AGE'],
+        current_app.config['STREAM_SEGMENT_MAX_AGE']
+    )
+    response.headers['Accept-Ranges'] = 'bytes'
+    return response
+    
+def _signed_stream_url(file_path):
+    """
+    Signed URL of a playlist. The token covers the playlist's directory, so
+    the relative variant, segment and preview URIs in it are signed too.
+    """
+    if not file_path:
+        return None
+    relative_path = relative_media_path(current_app.config['UPLOAD_FOLDER'], file_path)
+    if relative_path is None:
+        return None
+    token = sign_scope(
+        current_app.config['STREAM_SIGNING_KEY'],
+        os.path.dirname(relative_path),
+        current_app.config['STREAM_TOKEN_TTL']
+    )
+    return f'/v1/api/videos/stream/s/{token}/{quote(relative_path)}'
+
+def _add_stream_urls(item):
+    """Add ``stream_url`` (plus ``dash_url`` and ``trickplay_url``) next to a ``file_path``"""
+    item['stream_url'] = _signed_stream_url(item.get('file_path'))
+    dash_path = (item.get('manifests') or {}).get('dash')
+    if dash_path:
+        item['dash_url'] = _signed_stream_url(dash_path)
+    trickplay = item.get('trickplay')
+    if item['stream_url'] and trickplay:
+        base = item['stream_url'].rsplit('/', 1)[0]
+        item['trickplay_url'] = f"{base}/{os.path.relpath(trickplay['vtt_path'], os.path.dirname(item['file_path']))}"
+    return item
 
 @stream.route('/v1/api/videos/stream/<path:filename>', methods=['GET'])
 def stream_video(filename):
-    #ffmpeg -i input.mkv -c:v libx264 -c:a aac -f dash -hls_segment_type fmp4 output.m`pd
-    return send_file(filename, mimetype='application/x-mpegURL')
-    
+    if current_app.config['STREAM_REQUIRE_SIGNATURE']:
+        return {'status': 'failed', 'message': 'A signed playback URL is required'}, 403
+    return _serve_media(filename)
+
+@stream.route('/v1/api/videos/stream/s/<string:token>/<path:filename>', methods=['GET'])
+def stream_signed_video(token, filename):
+    """Serve a file with a playback token from the details or episode endpoint, no database access"""
+    return _serve_media(filename, token)
+
+def _requested_manifest_format(request):
+    """``?format=hls|dash``, otherwise whichever manifest type the Accept header prefers"""
+    requested = request.args.get('format')
+    if requested:
+        return requested.lower()
+    best = request.accept_mimetypes.best_match([MEDIA_TYPES['.m3u8'], MEDIA_TYPES['.mpd']], default=MEDIA_TYPES['.m3u8'])
+    return 'dash' if best == MEDIA_TYPES['.mpd'] else 'hls'
+
+@stream.route('/v1/api/videos/<string:content_id>/manifest', methods=['GET'])
+def get_manifest(content_id):
+    """
+    Redirect to the signed HLS or DASH manifest of a movie, or of an episode
+    with ``?season=<n>&episode=<n>``.
+    """
+    try:
+        manifest_format = _requested_manifest_format(request)
+        if manifest_format not in ('hls', 'dash'):
+            return {'status': 'failed', 'message': 'format must be hls or dash'}, 400
+        db = current_app.config['db']
+        content = db.catalog.find_one({'uuid': content_id}, {'file_path': 1, 'manifests': 1, 'seasons': 1})
+        if content is None:
+            return {'status': 'failed', 'message': 'Content not found'}, 404
+        item = content
+        if request.args.get('season') is not None:
+            season, episode = request.args.get('season', type=int), request.args.get('episode', type=int)
+            item = next((
+                e for s in content.get('seasons') or [] if s['season_number'] == season
+                for e in s['episodes'] if e['episode_number'] == episode
+            ), None)
+            if item is None:
+                return {'status': 'failed', 'message': 'Episode not found'}, 404
+        manifests = item.get('manifests') or {'hls': item.get('file_path')}
+        url = _signed_stream_url(manifests.get(manifest_format))
+        if url is None:
+            return {'status': 'failed', 'message': f'No {manifest_format} manifest for this content'}, 404
+        response = redirect(url, code=302)
+        response.vary.add('Accept')
+        response.headers['Cache-Control'] = 'private, no-store'
+        return response
+    except Exception as e:
+        current_app.logger.error(f'Error fetching manifest: {str(e)}')
+        return {'status': 'failed', 'message': 'Internal server error'}, 500
+
+@stream.route('/v1/api/videos/cache/stats', methods=['GET'])
+def cache_stats():
+    cache = current_app.config['stream_cache']
+    return {
+        'status': 'success',
+        'cache': cache.stats() if cache is not None else None,
+        'catalog': _catalog_cache.stats() if _catalog_cache is not None else None,
+    }, 200
+
 @stream.route('/v1/api/videos', methods=['GET'])
 def list_content():
+    """
+    List the whole catalog, or with ``?view=cards`` a page of card fields
+    (``limit``, ``cursor``) streamed as JSON or, with ``?format=ndjson``,
+    one title per line.
+    """
     try:
         db = current_app.config['db']
-        cursor = db.catalog.find()
-        content = [StreamContent(**item).to_json() for item in cursor]
-        return jsonify(content), 200
+        if request.args.get('view') == 'cards':
+            return _list_cards(db)
+        body = _catalog_cached('list:all', lambda: _json_body([StreamContent.json_from_bson(item) for item in db.catalog.find()]))
+        return Response(body, mimetype='application/json'), 200
     except Exception as e:
         return {'status': 'failed', 'message': str(e)}, 500
 
+def _dumps(value) -> str:
+    return compact_dumps(current_app.json, value)
+
+def _json_body(value) -> str:
+    return json_body(current_app.json, value)
+
+def _card(document):
+    card = {field: document.get(field) for field in CARD_FIELDS}
+    card['id'] = str(document['_id'])
+    return card
+
+def _stream_page(documents, limit, sort, transform=_card, meta=None):
+    """
+    Stream a keyset page of catalog documents as JSON or NDJSON. With the
+    catalog cache enabled the rendered page (at most ``limit`` items) is
+    cached by URL instead; ``documents`` is a lazy cursor, so a hit never
+    queries Mongo.
+    """
+    sort_keys = [key for key, _ in sort]
+    if request.args.get('format') == 'ndjson':
+        body, mimetype = stream_ndjson_page(documents, limit, sort_keys, transform, _dumps, meta), 'application/x-ndjson'
+    else:
+        body, mimetype = stream_json_page(documents, limit, sort_keys, transform, _dumps, meta), 'application/json'
+    if _catalog_cache is not None:
+        return Response(_catalog_cached(f'page:{request.full_path}', lambda: ''.join(body)), mimetype=mimetype)
+    return Response(stream_with_context(body), mimetype=mimetype)
+
+def _list_cards(db):
+    sort = [('_id', -1)]
+    try:
+        limit = page_size(request.args.get('limit'))
+        query = {}
+        if request.args.get('cursor'):
+            query = keyset_filter(sort, decode_cursor(request.args['cursor'], ['_id']))
+    except ValueError as e:
+        return {'status': 'failed', 'message': str(e)}, 400
+    # One extra document tells whether there is a next page
+    documents = db.catalog.find(query, {field: 1 for field in CARD_FIELDS}, sort=sort, limit=limit + 1, batch_size=limit + 1)
+    return _stream_page(documents, limit, sort)
+
+@stream.route('/v1/api/videos/search', methods=['GET'])
+def search_content():
+    """
+    Search the catalog. ``q`` is matched against the text index (title,
+    cast, genre, description) and ranks the results; without it they are
+    newest first. ``genre`` and ``year`` may be repeated, plus ``min_rating``,
+    ``type``, ``limit`` and ``cursor``. The page, the total and the genre and
+    year facet counts come from one aggregation.
+    """
+    try:
+        db = current_app.config['db']
+        text = request.args.get('q', '').strip()
+        sort = RELEVANCE_SORT if text else RECENT_SORT
+        content_type = None
+        if request.args.get('type'):
+            content_type = _validate_video_type(request.args['type'])
+            if not content_type:
+                return {'status': 'failed', 'message': 'Invalid content type. Use "tv-shows" or "movies"'}, 400
+        try:
+            match = search_match(
+                text,
+                request.args.getlist('genre'),
+                [int(year) for year in request.args.getlist('year')],
+                float(request.args['min_rating']) if request.args.get('min_rating') else None,
+                content_type
+            )
+            limit = page_size(request.args.get('limit'), default=20)
+            after = decode_cursor(request.args['cursor'], [key for key, _ in sort]) if request.args.get('cursor') else None
+        except ValueError:
+            return {'status': 'failed', 'message': 'Invalid search parameters'}, 400
+
+        def render():
+            row = next(db.catalog.aggregate(search_pipeline(match, CARD_FIELDS, sort, after, limit)), {})
+            documents = row.get('results', [])
+            data = []
+            for document in documents[:limit]:
+                card = _card(document)
+                if 'score' in document:
+                    card['score'] = round(document['score'], 4)
+                data.append(card)
+            next_cursor = None
+            if len(documents) > limit:
+                next_cursor = encode_cursor({key: documents[limit - 1][key] for key, _ in sort})
+            total = row['total'][0]['count'] if row.get('total') else 0
+            return _json_body({
+                'status': 'success',
+                'data': data,
+                'total': total,
+                'facets': search_facets(row),
+                'next_cursor': next_cursor,
+            })
+
+        body = _catalog_cached(f'search:{request.full_path}', render)
+        return Response(body, mimetype='application/json'), 200
+    except Exception as e:
+        current_app.logger.error(f'Error searching content: {str(e)}')
+        return {'status': 'failed', 'message': 'Internal server error'}, 500
+
 @stream.route('/v1/api/videos/<string:vtype>/list', methods=['GET'])
 def list_content_by_type(vtype):
+    """
+    Page through one content type, newest first. Pass the ``next_cursor`` of
+    a page as ``cursor`` to get the next one; ``include_total=true`` adds the
+    number of titles of the type, cached for ``CATALOG_COUNT_TTL`` seconds.
+    """
     try:
         db = current_app.config['db']
         # Validate and normalize video type
         normalized_type = _validate_video_type(vtype)
         if not normalized_type:
-            return {'status': 'failed', 'message': 'Invalid content type. Use "tv-shows" or "movies"'}, 400        
-        # Query database with pagination support
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 10))
-        skip = (page - 1) * per_page
-        
-        # Get total count for pagination
-        total_count = db.catalog.count_documents({'type': normalized_type})
-        
-        # Query with pagination
-        cursor = db.catalog.find(
-            {'type': normalized_type},
-            skip=skip,
-            limit=per_page
-        )
-        
-        # Convert results to JSON
-        content = [StreamContent(**item).to_json() for item in cursor]
-        
-        return jsonify({
-            'status': 'success',
-            'data': content,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total_count': total_count,
-                'total_pages': (total_count + per_page - 1) // per_page
-            }
-        }), 200
-        
-    except ValueError as e:
-        return {'status': 'failed', 'message': 'Invalid pagination parameters'}, 400
+            return {'status': 'failed', 'message': 'Invalid content type. Use "tv-shows" or "movies"'}, 400
+        sort = [('created_at', -1), ('_id', -1)]
+        try:
+            limit = page_size(request.args.get('limit', request.args.get('per_page')), default=10)
+            query = {'type': normalized_type}
+            if request.args.get('cursor'):
+                query.update(keyset_filter(sort, decode_cursor(request.args['cursor'], ['created_at', '_id'])))
+        except ValueError:
+            return {'status': 'failed', 'message': 'Invalid pagination parameters'}, 400
+
+        pagination = {'limit': limit}
+        if request.args.get('include_total', 'false').lower() == 'true':
+            pagination['total_count'] = current_app.config['catalog_counts'].get_or_set(
+                normalized_type,
+                lambda: db.catalog.count_documents({'type': normalized_type})
+            )
+        # Served by the type_1_created_at_-1__id_-1 index, one extra document tells whether there is a next page
+        documents = db.catalog.find(query, sort=sort, limit=limit + 1, batch_size=limit + 1)
+        return _stream_page(documents, limit, sort, StreamContent.json_from_bson, {'pagination': pagination})
+
     except Exception as e:
         current_app.logger.error(f'Error listing content: {str(e)}')
         return {'status': 'failed', 'message': 'Internal server error'}, 500
@@ -362,51 +1065,23 @@ def get_episode(content_id, season):
         # Validate content_id and season
         if not content_id or not isinstance(season, int):
             return {'status': 'failed', 'message': 'Invalid content_id or season'}, 400
-        
-        # Aggregate query to find the specific episode
-        cursor = db.catalog.aggregate([
-            { 
-                "$match": {
-                    "uuid": content_id,
-                    "seasons.season_number": season
-                }
-            },
-            {
-                "$unwind": "$seasons"
-            },
-            {
-                "$unwind": "$seasons.episodes"
-            },
-            {
-                "$project": {
-                    "uuid": 1,
-                    "title": 1,
-                    "release_year": 1,
-                    "genre": 1,
-                    "rating": 1,
-                    "type": { "$literal": "video" },
-                    "season_number": "$seasons.season_number",
-                    "episode": "$seasons.episodes.episode_number",
-                    "intro_start_time": "$seasons.episodes.intro_start_time",
-                    "intro_end_time":"$seasons.episodes.intro_end_time",
-                    "next_episode_time": "$seasons.episodes.next_episode_time",
-                    "file_path": "$seasons.episodes.file_path",
-                    "_id": 0
-                }
-            }
-        ])
-        
-        # Collect all results into a list
-        results = list(cursor)
-        
-        # Check if the list is empty
-        if not results:
+
+        def render():
+            # One range scan on the episodes index instead of unwinding the whole show
+            episodes = season_episodes(db, content_id, season)
+            if not episodes:
+                # Shows created before the episodes collection existed are indexed on first read
+                content = db.catalog.find_one({'uuid': content_id, 'seasons.season_number': season})
+                if content is None:
+                    return None
+                sync_episodes(db, content)
+                episodes = season_episodes(db, content_id, season)
+            return _json_body([_add_stream_urls(episode.to_json()) for episode in episodes])
+
+        body = _catalog_cached(f'season:{content_id}:{season}', render)
+        if body is None:
             return {'status': 'failed', 'message': 'Content not found'}, 404
-        
-        # Close the cursor to free up resources
-        cursor.close()
-        
-        return jsonify(results), 200
+        return Response(body, mimetype='application/json'), 200
         
     except Exception as e:
         current_app.logger.error(f'Error fetching episode: {str(e)}')
@@ -416,10 +1091,22 @@ def get_episode(content_id, season):
 def get_content(content_id):
     try:
         db = current_app.config['db']
-        cursor = db.catalog.find_one({'uuid': content_id})
-        if cursor is None:
+
+        def render():
+            cursor = db.catalog.find_one({'uuid': content_id})
+            if cursor is None:
+                return None
+            content = StreamContent.json_from_bson(cursor)
+            _add_stream_urls(content)
+            for season in content.get('seasons') or []:
+                for episode in season['episodes']:
+                    _add_stream_urls(episode)
+            return _json_body(content)
+
+        body = _catalog_cached(f'details:{content_id}', render)
+        if body is None:
             return {'status': 'failed', 'message': 'Content not found'}, 404
-        return jsonify(StreamContent(**cursor).to_json()), 200
+        return Response(body, mimetype='application/json'), 200
     except Exception as e:
         return {'status': 'failed', 'message': str(e)}, 500
 
@@ -430,7 +1117,7 @@ def upload_video():
     try:
         db = current_app.config['db']
         # Validate request
-        validation_error = _validate_upload_request(request)
+        validation_error = _validate_upload_request(request) or _validate_priority(request)
         if validation_error:
             return validation_error
         
@@ -442,14 +1129,14 @@ def upload_video():
         if video_type == 'tvshow':
             # Handle multiple files for TV shows
             metadata_list = request.form.getlist('metadata')
-            files = request.files.getlist('file')
+            files = _get_upload_sources(request)
             values['type'] = video_type
             values['seasons'] = []
             episodes = _get_season_episodes(values['show_details'])
             # Process each file with its metadata
             for file, metadata in zip(files, metadata_list):
                 metadata = json.loads(metadata)
-                video_path, video_output_path = _add_to_ffmpeg_queue(uuid, file, video_type, metadata)
+                video_path, video_output_path = _queue_source(uuid, file, video_type, metadata)
                 if isinstance(video_output_path, tuple):  # Error case
                     return video_output_path
                 
@@ -457,7 +1144,8 @@ def upload_video():
                     for episode in episodes[metadata['season']]:
                         if episode['episode_number'] == metadata['episode']:
                             episode['file_path'] = video_output_path
-                            episode['duration_seconds'] = _get_video_duration(video_path)
+                            if video_path is not None:
+                                episode['status'] = 'In-Progress'
                     if len(values['seasons']) > 0:
                         if metadata['season'] not in [s['season_number'] for s in values['seasons']]:
                             values['seasons'].append({
@@ -471,59 +1159,213 @@ def upload_video():
                         })
         else:
             # Handle single file for movies
-            file = request.files['file']
-            video_path, video_output_path = _add_to_ffmpeg_queue(uuid, file, video_type)
+            file = _get_upload_sources(request)[0]
+            video_path, video_output_path = _queue_source(uuid, file, video_type)
             if video_output_path:  # New conversion started or file already exists
                 if isinstance(video_output_path, tuple):  # Error case
                     return video_output_path
                 
                 values['file_path'] = video_output_path
-                values['duration_seconds'] = _get_video_duration(video_path)
-        content = StreamContent(**values)
-        insert_result = db.catalog.insert_one(content.to_bson())
-        return {'status': 'success', 'id': str(insert_result.inserted_id)}, 201
+        content = StreamContent(**values).to_bson()
+        insert_result = db.catalog.insert_one(content)
+        if video_type == 'tvshow':
+            sync_episodes(db, content)
+        _invalidate_catalog()
+        _submit_pending_jobs()
+        return {'status': 'success', 'id': str(insert_result.inserted_id), 'uuid': uuid}, 201
         
     except Exception as e:
         current_app.logger.error(f'Upload error: {str(e)}')
         return {'status': 'failed', 'message': str(e)}, 500
     
+def _new_episode_fields(episodes: Dict[int, List[Dict[str, Any]]], metadata: Dict[str, Any], video_output_path: str, queued: bool) -> Dict[str, Any]:
+    """Fields of an uploaded episode: its ``show_details`` entry, playlist and, when a transcode was queued, status"""
+    episode = next(
+        (dict(item) for item in episodes[metadata['season']] if item['episode_number'] == metadata['episode']),
+        {'episode_number': metadata['episode']}
+    )
+    episode['file_path'] = video_output_path
+    if queued:
+        episode['status'] = 'In-Progress'
+    return episode
+
 @stream.route('/v1/api/videos/<string:uuid>/new-episode', methods=['PUT'])
 @jwt_required()
 def new_episode(uuid):
     try:
+        validation_error = _validate_priority(request)
+        if validation_error:
+            return validation_error
         values = json.loads(request.form['values'])
         metadata_list = request.form.getlist('metadata')
-        files = request.files.getlist('file')
+        files = _get_upload_sources(request)
         db = current_app.config['db']
-        cursor = db.catalog.find_one({'uuid': uuid})
-        if cursor is None:
+        # Only the show fields copied onto episode entries, never the seasons
+        content = db.catalog.find_one({'uuid': uuid}, {field: 1 for field in ['uuid', *SHOW_FIELDS]})
+        if content is None:
             return {'status': 'failed', 'message': 'Content not found'}, 404
         episodes = _get_season_episodes(values['show_details'])
+        # A show without entries is indexed as a whole below, not just the new episodes
+        indexed = has_episodes(db, uuid)
         for file, metadata in zip(files, metadata_list):
             metadata = json.loads(metadata)
-            video_path, video_output_path = _add_to_ffmpeg_queue(uuid, file, 'tvshow', metadata)
+            video_path, video_output_path = _queue_source(uuid, file, 'tvshow', metadata)
             if isinstance(video_output_path, tuple):  # Error case
                 return video_output_path
             
             if video_output_path:
-                for season in cursor['seasons']:
-                    if season['season_number'] == metadata['season']:
-                        season['episodes'].append({
-                            'episode_number': metadata['episode'],
-                            'file_path': video_output_path,
-                            'duration_seconds': _get_video_duration(video_path)
-                        })
-                else:
-                    cursor['seasons'].append({
-                        'season_number': metadata['season'],
-                        'episodes': episodes[metadata['season']]
-                    })
-        db.catalog.update_one({'uuid': uuid}, {'$set': {'seasons': cursor['seasons']}})
+                episode = _new_episode_fields(episodes, metadata, video_output_path, queued=video_path is not None)
+                add_catalog_episode(db, uuid, metadata['season'], episode)
+                if indexed:
+                    upsert_episode(db, content, metadata['season'], episode)
+        if not indexed:
+            sync_episodes(db, db.catalog.find_one({'uuid': uuid}))
+        _invalidate_catalog()
+        _submit_pending_jobs()
         return {'status': 'success', 'message': 'Episode added'}, 200
                 
     except Exception as e:
         return {'status': 'failed', 'message': str(e)}, 500
     
+@stream.route('/v1/api/videos/uploads', methods=['POST'])
+@jwt_required()
+def create_upload():
+    """Start a resumable upload; chunks are appended straight into the upload directory"""
+    try:
+        db = current_app.config['db']
+        raw_data = request.get_json()
+        filename = raw_data.get('filename')
+        size = raw_data.get('size')
+        video_type = raw_data.get('type')
+        metadata = raw_data.get('metadata')
+        if not filename or not isinstance(size, int) or size <= 0 or not video_type:
+            return {'status': 'failed', 'message': 'filename, size and type are required'}, 400
+        if video_type not in ('movie', 'tvshow'):
+            return {'status': 'failed', 'message': 'Invalid video type, expected movie or tvshow'}, 400
+        if video_type == 'tvshow' and not (isinstance(metadata, dict) and all(metadata.get(key) for key in ('name', 'season', 'episode'))):
+            # Without it the file would land in UPLOAD_FOLDER itself, shared by every such upload
+            return {'status': 'failed', 'message': 'metadata with name, season and episode is required for tvshow'}, 400
+        if size > current_app.config['MAX_FILE_SIZE']:
+            return {'status': 'failed', 'message': 'File size exceeds maximum allowed'}, 413
+        if raw_data.get('checksum'):
+            parse_checksum(raw_data['checksum'])
+
+        video_path, video_output_path = _prepare_upload_paths(filename, video_type, metadata)
+        if video_path is None:
+            return video_output_path
+        if _upload_target_taken(db, video_path, video_output_path):
+            return {'status': 'failed', 'message': 'Another upload of this title is in progress or already converted'}, 409
+        upload_id = str(uuid4())
+        session = UploadSession(
+            uuid=upload_id,
+            filename=filename,
+            type=video_type,
+            metadata=metadata,
+            size=size,
+            checksum=raw_data.get('checksum'),
+            # Named by upload id so a second session can never truncate this one
+            part_path=os.path.join(os.path.dirname(video_path), f'{upload_id}.part'),
+            video_path=video_path,
+            video_output_path=video_output_path,
+            user_uuid=get_jwt().get('user_uuid')
+        )
+        # The unique index on open sessions settles two requests racing past the check above
+        db.upload_sessions.insert_one(session.to_bson(current_app.config['UPLOAD_SESSION_TTL']))
+        open(session.part_path, 'wb').close()
+        return {'status': 'success', 'upload_id': session.uuid, 'offset': 0, 'size': size}, 201
+    except DuplicateKeyError:
+        return {'status': 'failed', 'message': 'Another upload of this title is in progress'}, 409
+    except ValueError as e:
+        return {'status': 'failed', 'message': str(e)}, 400
+    except Exception as e:
+        current_app.logger.error(f'Upload init error: {str(e)}')
+        return {'status': 'failed', 'message': str(e)}, 500
+
+@stream.route('/v1/api/videos/uploads/<string:upload_id>', methods=['GET'])
+@jwt_required()
+def get_upload(upload_id):
+    """Report how many bytes have been received so a client can resume"""
+    try:
+        db = current_app.config['db']
+        session = db.upload_sessions.find_one({'uuid': upload_id})
+        if session is None:
+            return {'status': 'failed', 'message': 'Upload not found'}, 404
+        if session['status'] == 'open':
+            session['offset'] = os.path.getsize(session['part_path']) if os.path.exists(session['part_path']) else 0
+        return {'status': 'success', 'upload': UploadSession.json_from_bson(session)}, 200
+    except Exception as e:
+        return {'status': 'failed', 'message': str(e)}, 500
+
+@stream.route('/v1/api/videos/uploads/<string:upload_id>', methods=['PUT'])
+@jwt_required()
+def upload_chunk(upload_id):
+    """
+    Append a chunk to a resumable upload. The ``Upload-Offset`` header must
+    match the number of bytes already received; the body is streamed to disk.
+    """
+    try:
+        db = current_app.config['db']
+        session = db.upload_sessions.find_one({'uuid': upload_id})
+        if session is None:
+            return {'status': 'failed', 'message': 'Upload not found'}, 404
+        if session['status'] != 'open':
+            return {'status': 'failed', 'message': 'Upload is already finalized'}, 409
+
+        # The file on disk is the source of truth for the offset; append_chunk
+        # checks it under a lock so a retry racing the original request fails
+        offset = int(request.headers.get('Upload-Offset', -1))
+        limit = min(session['size'], current_app.config['MAX_FILE_SIZE'])
+        new_offset = append_chunk(session['part_path'], request.stream, offset, limit)
+        db.upload_sessions.update_one(
+            {'uuid': upload_id},
+            {'$set': {'offset': new_offset, 'updated_at': datetime.now(timezone.utc)}}
+        )
+        return {'status': 'success', 'offset': new_offset, 'size': session['size']}, 200
+    except UploadOffsetError as e:
+        return {'status': 'failed', 'message': str(e), 'offset': e.offset}, 409
+    except UploadLimitError as e:
+        return {'status': 'failed', 'message': str(e)}, 413
+    except ValueError:
+        return {'status': 'failed', 'message': 'Invalid Upload-Offset header'}, 400
+    except Exception as e:
+        current_app.logger.error(f'Upload chunk error: {str(e)}')
+        return {'status': 'failed', 'message': str(e)}, 500
+
+@stream.route('/v1/api/videos/uploads/<string:upload_id>/finalize', methods=['POST'])
+@jwt_required()
+def finalize_upload(upload_id):
+    """Check size and optional checksum, then move the upload into place"""
+    try:
+        db = current_app.config['db']
+        session = db.upload_sessions.find_one({'uuid': upload_id})
+        if session is None:
+            return {'status': 'failed', 'message': 'Upload not found'}, 404
+        if session['status'] != 'open':
+            return {'status': 'success', 'upload_id': upload_id, 'video_path': session['video_path']}, 200
+
+        received = os.path.getsize(session['part_path'])
+        if received != session['size']:
+            return {'status': 'failed', 'message': 'Upload is incomplete', 'offset': received}, 409
+        if session.get('checksum'):
+            algorithm, expected = parse_checksum(session['checksum'])
+            if file_checksum(session['part_path'], algorithm) != expected:
+                os.remove(session['part_path'])
+                db.upload_sessions.update_one({'uuid': upload_id}, {'$set': {'status': 'failed', 'offset': 0}})
+                return {'status': 'failed', 'message': 'Checksum mismatch'}, 422
+
+        if os.path.exists(session['video_path']):
+            # Never replace a source that is queued or being transcoded
+            return {'status': 'failed', 'message': 'A source file for this title already exists'}, 409
+        os.replace(session['part_path'], session['video_path'])
+        db.upload_sessions.update_one(
+            {'uuid': upload_id},
+            {'$set': {'status': 'complete', 'offset': received, 'updated_at': datetime.now(timezone.utc)}}
+        )
+        return {'status': 'success', 'upload_id': upload_id, 'video_path': session['video_path']}, 200
+    except Exception as e:
+        current_app.logger.error(f'Upload finalize error: {str(e)}')
+        return {'status': 'failed', 'message': str(e)}, 500
+
 @stream.route('/v1/api/videos', methods=['POST'])
 @jwt_required()
 def create_content():
@@ -532,6 +1374,7 @@ def create_content():
         raw_data = request.get_json()
         content = StreamContent(**raw_data)
         insert_result = db.catalog.insert_one(content.to_bson())
+        _invalidate_catalog()
         return {'status': 'success', 'id': str(insert_result.inserted_id)}, 201
     except Exception as e:
         return {'status': 'failed', 'message': str(e)}, 500
\ No newline at end of file
@@ -16,7 +16,7 @@ def get_users():
     try:
         db = current_app.config['db']
         cursor = db.users.find()
-        users = [User(**doc).to_json() for doc in cursor]
+        users = [User.json_from_bson(doc) for doc in cursor]
         return jsonify(users), 200
     except Exception as e:
         print(e)
@@ -29,7 +29,7 @@ def get_user(user_id):
         db = current_app.config['db']
         object_id = ObjectId(user_id)
         cursor = db.users.find_one({'_id': object_id})
-        user = User(**cursor).to_json()
+        user = User.json_from_bson(cursor)
         return {'status': 'success', 'user': user}, 200
     except Exception as e:
         print(e)
@@ -12,7 +12,7 @@ def get_viewers():
     try:
         db = current_app.config['db']
         cursor = db.viewers.find({'user_uuid': get_jwt()['user_uuid']})
-        viewers = [Viewer(**doc).to_json() for doc in cursor]
+        viewers = [Viewer.json_from_bson(doc) for doc in cursor]
         return jsonify(viewers), 200
     except Exception as e:
         print(e)
@@ -24,7 +24,7 @@ def get_viewer(viewer_uuid):
     try:
         db = current_app.config['db']
         cursor = db.viewers.find_one({'uuid': viewer_uuid})
-        viewer = Viewer(**cursor).to_json()
+        viewer = Viewer.json_from_bson(cursor)
         return jsonify(viewer), 200
     except Exception as e:
         print(e)
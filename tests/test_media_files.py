@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from utils.media_files import relative_media_path, resolve_media_path
+
+@pytest.fixture
+def upload_folder(tmp_path, monkeypatch):
+    """A relative ``uploads/`` folder with one transcoded title, like ``UPLOAD_FOLDER=uploads/``"""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('uploads/movie/foo')
+    with open('uploads/movie/foo/master.m3u8', 'w') as f:
+        f.write('#EXTM3U\n')
+    with open('secret.txt', 'w') as f:
+        f.write('secret\n')
+    return 'uploads/'
+
+def test_resolve_path_relative_to_root(upload_folder):
+    assert resolve_media_path(upload_folder, 'movie/foo/master.m3u8') == 'movie/foo/master.m3u8'
+
+def test_resolve_path_relative_to_working_directory(upload_folder):
+    assert resolve_media_path(upload_folder, 'uploads/movie/foo/master.m3u8') == 'movie/foo/master.m3u8'
+
+def test_resolve_absolute_path(upload_folder, tmp_path):
+    requested = str(tmp_path / 'uploads/movie/foo/master.m3u8').lstrip('/')
+    assert resolve_media_path(upload_folder, requested) == 'movie/foo/master.m3u8'
+
+def test_resolve_rejects_paths_outside_root(upload_folder):
+    assert resolve_media_path(upload_folder, 'secret.txt') is None
+    assert resolve_media_path(upload_folder, 'uploads/../secret.txt') is None
+    assert resolve_media_path(upload_folder, '../secret.txt') is None
+
+def test_resolve_missing_file(upload_folder):
+    assert resolve_media_path(upload_folder, 'uploads/movie/foo/missing.m3u8') is None
+
+def test_relative_path_of_relative_catalog_path(upload_folder):
+    assert relative_media_path(upload_folder, 'uploads/movie/foo/master.m3u8') == 'movie/foo/master.m3u8'
+
+def test_relative_path_of_absolute_catalog_path(upload_folder, tmp_path):
+    assert relative_media_path(upload_folder, str(tmp_path / 'uploads/movie/foo/master.m3u8')) == 'movie/foo/master.m3u8'
+
+def test_relative_path_outside_root(upload_folder, tmp_path):
+    assert relative_media_path(upload_folder, 'secret.txt') is None
+    assert relative_media_path(upload_folder, str(tmp_path / 'secret.txt')) is None
+    assert relative_media_path(upload_folder, 'uploads/../secret.txt') is None
@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+class CachedFile(NamedTuple):
+    data: bytes
+    mtime: float
+    mtime_ns: int
+    size: int
+
+    @property
+    def etag(self) -> str:
+        return f'{self.mtime_ns:x}-{self.size:x}'
+
+class ByteLRUCache:
+    """
+    Least-recently-used cache of small files, bounded by total bytes.
+
+    Entries are keyed by path and checked against the file's mtime and size
+    at most every ``revalidate_after`` seconds, so a rewritten playlist is
+    picked up without every request touching the storage.
+    """
+
+    def __init__(self, max_bytes: int, max_item_bytes: int, revalidate_after: float = 1.0):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self.revalidate_after = revalidate_after
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str) -> Optional[CachedFile]:
+        """
+        Contents of ``path`` from the cache, reading it on a miss.
+
+        Returns:
+            Optional[CachedFile]: None if the file is larger than
+            ``max_item_bytes``; it should be streamed from disk instead.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and now - entry[1] < self.revalidate_after:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[0]
+
+        stat = os.stat(path)
+        if stat.st_size > self.max_item_bytes:
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0].mtime_ns == stat.st_mtime_ns and entry[0].size == stat.st_size:
+                self._entries[path] = (entry[0], now)
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        cached = CachedFile(data, stat.st_mtime, stat.st_mtime_ns, len(data))
+        with self._lock:
+            self._remove(path)
+            self._entries[path] = (cached, now)
+            self._bytes += cached.size
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return cached
+
+    def invalidate(self, path: str = None):
+        """Drop one path, or everything"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                self._remove(path)
+
+    def _remove(self, path):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._bytes -= entry[0].size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+class TTLCache:
+    """Small in-process cache of computed values that expire after ``ttl`` seconds"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get_or_set(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is not None and entry[1] > now:
+                return entry[0]
+        value = compute()
+        with self._lock:
+            self._values[key] = (value, now + self.ttl)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
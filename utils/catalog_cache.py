@@ -0,0 +1,128 @@
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+class CatalogCache:
+    """
+    Read cache for catalog documents and rendered catalog responses.
+
+    Every entry is tagged with the catalog version stored in the
+    ``cache_versions`` collection. Writes call ``invalidate``, which bumps
+    the version; each replica reads it at most every ``check_interval``
+    seconds, so a write on one pod invalidates every other pod within that
+    interval. With ``watch`` a change stream on ``catalog`` (requires a
+    replica set) also clears the cache as soon as anything changes the
+    collection, including writes that bypass this API.
+    """
+
+    def __init__(self, db, ttl: float = 60, check_interval: float = 1.0, max_entries: int = 2048):
+        self.db = db
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._watcher = None
+        # Bumped on every local clear so values computed before it are not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _current_version(self):
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.check_interval:
+            return self._version
+        state = self.db.cache_versions.find_one({'_id': 'catalog'}) or {}
+        version = state.get('version', 0)
+        with self._lock:
+            if version != self._version:
+                self._clear()
+            self._version = version
+            self._checked_at = now
+        return version
+
+    def get_or_set(self, key, compute):
+        """
+        Cached value of ``key``, computed with ``compute()`` on a miss. If the
+        version cannot be read the cache is bypassed.
+        """
+        try:
+            version = self._current_version()
+        except PyMongoError as e:
+            logger.error(f'Unable to read catalog cache version: {str(e)}')
+            return compute()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == version and entry[2] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generation = self._generation
+        value = compute()
+        with self._lock:
+            if generation != self._generation:
+                return value
+            self._entries[key] = (value, version, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self):
+        """Drop the local entries and bump the shared version for every other replica"""
+        with self._lock:
+            self._clear()
+        try:
+            state = self.db.cache_versions.find_one_and_update(
+                {'_id': 'catalog'},
+                {'$inc': {'version': 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            with self._lock:
+                self._version = state['version']
+                self._checked_at = time.monotonic()
+        except PyMongoError as e:
+            logger.error(f'Unable to bump catalog cache version: {str(e)}')
+
+    def watch(self):
+        """Clear the cache on every catalog change, in a background thread"""
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name='catalog-cache-watch', daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        while True:
+            try:
+                with self.db.catalog.watch() as changes:
+                    for _ in changes:
+                        with self._lock:
+                            self._clear()
+            except PyMongoError as e:
+                logger.error(f'Catalog change stream stopped, relying on version checks: {str(e)}')
+                time.sleep(30)
+
+    def _clear(self):
+        self._entries.clear()
+        self._generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'version': self._version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'watching': self._watcher is not None,
+            }
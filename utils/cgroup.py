@@ -0,0 +1,58 @@
+import math
+import os
+
+CGROUP_V2_CPU_MAX = '/sys/fs/cgroup/cpu.max'
+CGROUP_V1_CPU_QUOTA = '/sys/fs/cgroup/cpu/cpu.cfs_quota_us'
+CGROUP_V1_CPU_PERIOD = '/sys/fs/cgroup/cpu/cpu.cfs_period_us'
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def cpu_limit() -> float:
+    """
+    Get the number of CPUs this container may use.
+
+    Reads the cgroup v2 (``cpu.max``) or v1 (``cfs_quota_us``) CPU quota and
+    falls back to the host CPU count when no quota is set.
+
+    Returns:
+        float: Available CPUs, e.g. 3.5 for a ``3500m`` Kubernetes limit.
+    """
+    host_cpus = os.cpu_count() or 1
+
+    cpu_max = _read(CGROUP_V2_CPU_MAX)
+    if cpu_max:
+        quota, _, period = cpu_max.partition(' ')
+        if quota != 'max' and period:
+            return min(host_cpus, int(quota) / int(period))
+        return float(host_cpus)
+
+    quota, period = _read(CGROUP_V1_CPU_QUOTA), _read(CGROUP_V1_CPU_PERIOD)
+    if quota and period and int(quota) > 0:
+        return min(host_cpus, int(quota) / int(period))
+    return float(host_cpus)
+
+def default_worker_count(cpus: float) -> int:
+    """
+    Number of concurrent transcode jobs: one per two CPUs, rounded up, so a
+    3.5 CPU pod transcodes two videos at a time.
+
+    Returns:
+        int: Number of concurrent transcode jobs, at least 1.
+    """
+    return max(1, math.ceil(cpus / 2))
+
+def default_ffmpeg_threads(cpus: float, workers: int, encoders: int) -> int:
+    """
+    Size ``-threads`` so that ``workers`` jobs share ``cpus``. A job runs one
+    x264 encoder per encoded rendition, each with its own threads, so the
+    share of a job is split between its ``encoders``.
+
+    Returns:
+        int: Threads of every encoder, at least 1.
+    """
+    return max(1, math.floor(cpus / (max(1, workers) * max(1, encoders))))
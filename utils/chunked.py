@@ -0,0 +1,232 @@
+import csv
+import contextvars
+import filecmp
+import math
+import os
+import shutil
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.ffmpeg_runner import run_ffmpeg
+from utils.hls import VARIANT_PLAYLIST, build_hls_command
+from utils.trickplay import TRICKPLAY_DIR, collect_chunk_sheets
+
+logger = logging.getLogger(__name__)
+
+CHUNK_DIR = '.chunks'
+
+def encode_audio(video_path: str, work_dir: str, bitrates: List[int], nice: int = 0) -> str:
+    """
+    Encode the source audio once to one AAC stream per bitrate (kbit/s).
+    Chunks copy these streams, so the encoder priming is only at the start
+    of the title and not at every chunk joint.
+
+    Returns:
+        str: Path of the audio file, streams in the order of ``bitrates``.
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    audio_path = os.path.join(work_dir, 'audio.mka')
+    args = ['ffmpeg', '-y', '-i', video_path, '-vn']
+    for index, bitrate in enumerate(bitrates):
+        args += ['-map', '0:a:0', f'-c:a:{index}', 'aac', f'-ac:a:{index}', '2', f'-b:a:{index}', f'{bitrate}k']
+    run_ffmpeg(args + [audio_path], nice=nice)
+    return audio_path
+
+def split_source(video_path: str, work_dir: str, chunk_seconds: int, nice: int = 0,
+                 audio_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Split the source into chunks at the first keyframe after every
+    ``chunk_seconds`` without re-encoding. Timestamps are kept so that the
+    encoded chunks line up on one timeline. With ``audio_path`` the chunks
+    carry its audio streams instead of the source audio.
+
+    Returns:
+        List[Dict[str, Any]]: Chunks in order, with ``path`` and ``start``.
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    chunk_list = os.path.join(work_dir, 'chunks.csv')
+    if audio_path:
+        inputs = ['-i', video_path, '-i', audio_path, '-map', '0:v:0', '-map', '1:a']
+    else:
+        inputs = ['-i', video_path, '-map', '0:v:0', '-map', '0:a:0?']
+    run_ffmpeg([
+        'ffmpeg', '-y', *inputs,
+        '-c', 'copy',
+        '-f', 'segment',
+        '-segment_time', str(chunk_seconds),
+        '-reset_timestamps', '0',
+        '-segment_list', chunk_list,
+        '-segment_list_type', 'csv',
+        os.path.join(work_dir, 'chunk_%04d.mkv'),
+    ], nice=nice)
+    with open(chunk_list) as f:
+        return [
+            {'path': os.path.join(work_dir, row[0]), 'start': float(row[1]), 'end': float(row[2])}
+            for row in csv.reader(f) if row
+        ]
+
+def _parse_media_playlist(path: str) -> Dict[str, Any]:
+    playlist = {'init': None, 'segments': []}
+    duration = None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('#EXT-X-MAP:'):
+                playlist['init'] = line.split('URI="', 1)[1].split('"', 1)[0]
+            elif line.startswith('#EXTINF:'):
+                duration = float(line[len('#EXTINF:'):].split(',', 1)[0])
+            elif line and not line.startswith('#'):
+                playlist['segments'].append({'uri': line, 'duration': duration})
+    return playlist
+
+class RenditionStitcher:
+    """
+    Merge the per-chunk playlists of one rendition into a single playlist.
+    Segments are renumbered into ``output_dir/<name>/`` and share the first
+    chunk's init segment; a chunk whose init segment differs is signalled
+    with a discontinuity and its own EXT-X-MAP. Chunks are added in order
+    as they finish, so the playlist can be published while later chunks
+    are still encoding. ``target_duration`` is the least target duration,
+    so that it stays the same while an EVENT playlist grows.
+    """
+
+    def __init__(self, output_dir: str, name: str, target_duration: int = 0):
+        self.name = name
+        self.target_duration = target_duration
+        self.rendition_dir = os.path.join(output_dir, name)
+        os.makedirs(self.rendition_dir, exist_ok=True)
+        self.lines = []
+        self.durations = []
+        self.shared_init = None
+        self.current_init = None
+
+    def add(self, chunk_dir: str, index: int):
+        """Move the segments of chunk ``index`` into the rendition directory"""
+        name = self.name
+        source_dir = os.path.join(chunk_dir, name)
+        playlist = _parse_media_playlist(os.path.join(source_dir, VARIANT_PLAYLIST))
+        init_uri = None
+        if playlist['init']:
+            init_path = os.path.join(source_dir, playlist['init'])
+            if self.shared_init is None:
+                self.shared_init = os.path.join(self.rendition_dir, f'init_{name}.mp4')
+                shutil.move(init_path, self.shared_init)
+                init_uri = os.path.basename(self.shared_init)
+            elif filecmp.cmp(init_path, self.shared_init, shallow=False):
+                init_uri = os.path.basename(self.shared_init)
+            else:
+                init_uri = f'init_{name}_{index:04d}.mp4'
+                shutil.move(init_path, os.path.join(self.rendition_dir, init_uri))
+        if init_uri != self.current_init:
+            if self.current_init is not None:
+                self.lines.append('#EXT-X-DISCONTINUITY')
+            self.lines.append(f'#EXT-X-MAP:URI="{init_uri}"')
+            self.current_init = init_uri
+        for segment in playlist['segments']:
+            extension = os.path.splitext(segment['uri'])[1]
+            target = f'seg_{len(self.durations):05d}{extension}'
+            shutil.move(os.path.join(source_dir, segment['uri']), os.path.join(self.rendition_dir, target))
+            self.lines.append(f"#EXTINF:{segment['duration']:.6f},")
+            self.lines.append(target)
+            self.durations.append(segment['duration'])
+
+    def write(self, final: bool = True) -> str:
+        """
+        Write the playlist of the chunks added so far: a growing EVENT
+        playlist, or the VOD playlist with ``EXT-X-ENDLIST`` once ``final``.
+        The file is replaced atomically, so players never read half of it.
+
+        Returns:
+            str: Path of the stitched playlist.
+        """
+        header = [
+            '#EXTM3U',
+            '#EXT-X-VERSION:7',
+            f'#EXT-X-TARGETDURATION:{max(math.ceil(max(self.durations, default=0)), self.target_duration)}',
+            '#EXT-X-MEDIA-SEQUENCE:0',
+            f"#EXT-X-PLAYLIST-TYPE:{'VOD' if final else 'EVENT'}",
+            '#EXT-X-INDEPENDENT-SEGMENTS',
+        ]
+        playlist_path = os.path.join(self.rendition_dir, VARIANT_PLAYLIST)
+        with open(playlist_path + '.tmp', 'w') as f:
+            f.write('\n'.join(header + self.lines + (['#EXT-X-ENDLIST'] if final else [])) + '\n')
+        os.replace(playlist_path + '.tmp', playlist_path)
+        return playlist_path
+
+def transcode_chunked(video_path: str, output_dir: str, renditions: List[Dict[str, Any]],
+                      chunk_seconds: int, chunk_workers: int, hls_segment_time: int = 10,
+                      threads: int = 0, audio_codec: str = 'aac', tracker=None, nice: int = 0,
+                      trickplay: Optional[Dict[str, Any]] = None, progressive: bool = False,
+                      on_chunk: Optional[Callable[[int], None]] = None) -> List[Dict[str, Any]]:
+    """
+    Transcode a long video in parallel: split it at keyframes, encode every
+    chunk into the full rendition ladder on ``chunk_workers`` concurrent
+    ffmpeg processes and stitch the fMP4 segments back into one playlist per
+    rendition. Progress of every chunk is reported to ``tracker``; every
+    ffmpeg process runs at ``nice``. Trickplay sprite sheets are rendered
+    per chunk and moved into ``output_dir/trickplay``. Audio is encoded
+    once from the whole source and copied into every chunk.
+
+    Each chunk is stitched as soon as it and every chunk before it are
+    done. With ``progressive`` the rendition playlists are then published
+    as EVENT playlists and ``on_chunk`` is called with the chunk index.
+
+    Returns:
+        List[Dict[str, Any]]: The chunks with their ``start``, ``end`` and
+        trickplay ``sheets``.
+    """
+    work_dir = os.path.join(output_dir, CHUNK_DIR)
+    try:
+        audio_tracks = None
+        audio_path = None
+        if audio_codec != 'copy' and any(rendition['audio_bitrate'] for rendition in renditions):
+            audio_tracks = sorted({rendition['audio_bitrate'] for rendition in renditions if rendition['audio_bitrate']}, reverse=True)
+            audio_path = encode_audio(video_path, work_dir, audio_tracks, nice)
+        chunks = split_source(video_path, work_dir, chunk_seconds, nice, audio_path)
+        chunk_dirs = []
+        commands = []
+        for index, chunk in enumerate(chunks):
+            chunk_dir = os.path.join(work_dir, f'{index:04d}')
+            for rendition in renditions:
+                os.makedirs(os.path.join(chunk_dir, rendition['name']), exist_ok=True)
+            if trickplay:
+                os.makedirs(os.path.join(chunk_dir, TRICKPLAY_DIR), exist_ok=True)
+            command = build_hls_command(
+                chunk['path'], chunk_dir, renditions, hls_segment_time, 0, 'fmp4', threads, audio_codec, trickplay,
+                start_time=chunk['start'], audio_tracks=audio_tracks
+            )
+            # Keep the source timestamps so segments continue across chunks
+            command.insert(command.index('-i'), '-copyts')
+            chunk_dirs.append(chunk_dir)
+            commands.append(command)
+
+        logger.info(f'Transcoding {video_path} in {len(chunks)} chunks on {chunk_workers} workers')
+        callbacks = [
+            tracker.callback(index, chunk['start'], chunk['end'] - chunk['start']) if tracker else None
+            for index, chunk in enumerate(chunks)
+        ]
+        # Chunk encodes run in the job's context, so they join its ffmpeg process group
+        context = contextvars.copy_context()
+        stitchers = [RenditionStitcher(output_dir, rendition['name'], hls_segment_time) for rendition in renditions]
+        with ThreadPoolExecutor(max_workers=chunk_workers) as executor:
+            # Results arrive in chunk order; the first ffmpeg failure is re-raised here
+            results = executor.map(
+                lambda command, callback: context.copy().run(run_ffmpeg, command, callback, nice),
+                commands, callbacks
+            )
+            for index, _ in enumerate(results):
+                for stitcher in stitchers:
+                    stitcher.add(chunk_dirs[index], index)
+                    if progressive:
+                        stitcher.write(final=False)
+                if progressive and on_chunk is not None:
+                    on_chunk(index)
+
+        for stitcher in stitchers:
+            stitcher.write()
+        if trickplay:
+            return collect_chunk_sheets(chunk_dirs, chunks, output_dir)
+        return [{'start': chunk['start'], 'end': chunk['end'], 'sheets': []} for chunk in chunks]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,119 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from pymongo import ASCENDING, UpdateOne
+
+from models.episode_model import SHOW_FIELDS, EpisodeEntry
+
+# Episode fields kept in sync with the show's seasons array
+EPISODE_FIELDS = [
+    field for field in EpisodeEntry.model_fields
+    if field not in ('id', 'content_uuid', 'season_number', 'episode_number', 'show', 'updated_at')
+]
+
+def _key(content_uuid: str, season_number: int, episode_number: int) -> Dict[str, Any]:
+    return {'content_uuid': content_uuid, 'season_number': season_number, 'episode_number': episode_number}
+
+def episode_entries(content: Dict[str, Any]) -> List[EpisodeEntry]:
+    """Episode entries of a show document from ``catalog``"""
+    show = {field: content.get(field) for field in SHOW_FIELDS}
+    entries = []
+    for season in content.get('seasons') or []:
+        for episode in season.get('episodes') or []:
+            entries.append(EpisodeEntry(
+                content_uuid=content['uuid'],
+                season_number=season['season_number'],
+                show=show,
+                **{field: episode.get(field) for field in ['episode_number', *EPISODE_FIELDS]}
+            ))
+    return entries
+
+def sync_episodes(db, content: Dict[str, Any]) -> int:
+    """
+    Make the ``episodes`` of a show match its ``seasons`` array: upsert
+    every episode and remove the ones that are no longer there.
+
+    Returns:
+        int: Number of episodes of the show.
+    """
+    entries = episode_entries(content)
+    if entries:
+        db.episodes.bulk_write([
+            UpdateOne(
+                _key(entry.content_uuid, entry.season_number, entry.episode_number),
+                {'$set': entry.to_bson()},
+                upsert=True
+            )
+            for entry in entries
+        ], ordered=False)
+    db.episodes.delete_many({
+        'content_uuid': content['uuid'],
+        '$nor': [{'season_number': entry.season_number, 'episode_number': entry.episode_number} for entry in entries] or [{'_id': None}],
+    })
+    return len(entries)
+
+def has_episodes(db, content_uuid: str) -> bool:
+    """False for a show that has no entries yet, e.g. one created before the ``episodes`` collection existed"""
+    return db.episodes.find_one({'content_uuid': content_uuid}, {'_id': 1}) is not None
+
+def upsert_episode(db, content: Dict[str, Any], season_number: int, episode: Dict[str, Any]):
+    """Create or update the entry of one episode; fields that are not given are kept"""
+    entry = EpisodeEntry(
+        content_uuid=content['uuid'],
+        season_number=season_number,
+        show={field: content.get(field) for field in SHOW_FIELDS},
+        **{field: value for field, value in episode.items() if field in ('episode_number', *EPISODE_FIELDS)}
+    )
+    db.episodes.update_one(_key(content['uuid'], season_number, entry.episode_number), {'$set': entry.to_bson()}, upsert=True)
+
+def add_catalog_episode(db, content_uuid: str, season_number: int, episode: Dict[str, Any], attempts: int = 3) -> bool:
+    """
+    Add an episode to a show's ``seasons`` array, or update the fields given
+    in ``episode`` if it is already there, without reading the show. Each
+    step is one atomic update guarded by its own filter, so concurrent
+    uploads never duplicate a season or an episode; a step that lost a race
+    is retried.
+
+    Returns:
+        bool: False if the show does not exist.
+    """
+    number = episode['episode_number']
+    for _ in range(attempts):
+        result = db.catalog.update_one(
+            {'uuid': content_uuid, 'seasons': {'$elemMatch': {'season_number': season_number, 'episodes.episode_number': number}}},
+            {'$set': {f'seasons.$[s].episodes.$[e].{key}': value for key, value in episode.items()}},
+            array_filters=[{'s.season_number': season_number}, {'e.episode_number': number}]
+        )
+        if result.matched_count:
+            return True
+        # The season exists but not the episode
+        result = db.catalog.update_one(
+            {'uuid': content_uuid, 'seasons': {'$elemMatch': {'season_number': season_number, 'episodes.episode_number': {'$ne': number}}}},
+            {'$push': {'seasons.$.episodes': episode}}
+        )
+        if result.matched_count:
+            return True
+        result = db.catalog.update_one(
+            {'uuid': content_uuid, 'seasons.season_number': {'$ne': season_number}},
+            {'$push': {'seasons': {'season_number': season_number, 'episodes': [episode]}}}
+        )
+        if result.matched_count:
+            return True
+    return False
+
+def update_episode(db, content_uuid: str, season_number: int, episode_number: int, fields: Dict[str, Any]) -> bool:
+    """Copy the episode fields among ``fields`` to one episode entry"""
+    fields = {key: value for key, value in fields.items() if key in EPISODE_FIELDS}
+    if not fields:
+        return False
+    fields['updated_at'] = datetime.now(timezone.utc)
+    result = db.episodes.update_one(_key(content_uuid, season_number, episode_number), {'$set': fields})
+    return result.matched_count > 0
+
+def season_episodes(db, content_uuid: str, season_number: int) -> List[EpisodeEntry]:
+    """Episodes of one season in order, served by the ``content_uuid_1_season_number_1_episode_number_1`` index"""
+    cursor = db.episodes.find(
+        {'content_uuid': content_uuid, 'season_number': season_number},
+        sort=[('episode_number', ASCENDING)]
+    )
+    return [EpisodeEntry(**document) for document in cursor]
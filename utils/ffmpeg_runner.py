@@ -0,0 +1,157 @@
+import os
+import subprocess
+import threading
+import logging
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+_running = set()
+_running_lock = threading.Lock()
+STDERR_TAIL = 64 * 1024
+
+class JobCancelledError(Exception):
+    pass
+
+class ProcessGroup:
+    """
+    The ffmpeg processes of one job. While the group is entered, every
+    ``run_ffmpeg`` in the same context joins it; ``terminate`` stops them
+    all and makes later ones fail, e.g. once the job's lease is lost and
+    another worker may be writing the same output.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self._processes = set()
+        self._lock = threading.Lock()
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_group.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _current_group.reset(self._token)
+
+    def add(self, process):
+        with self._lock:
+            self._processes.add(process)
+            cancelled = self.cancelled
+        if cancelled:
+            process.terminate()
+
+    def discard(self, process):
+        with self._lock:
+            self._processes.discard(process)
+
+    def terminate(self):
+        with self._lock:
+            self.cancelled = True
+            processes = list(self._processes)
+        for process in processes:
+            logger.warning(f'Terminating ffmpeg process {process.pid}')
+            process.terminate()
+
+_current_group: ContextVar[ProcessGroup] = ContextVar('ffmpeg_process_group', default=None)
+
+def ensure_active():
+    """
+    Raises:
+        JobCancelledError: If the process group of the current job was terminated.
+    """
+    group = _current_group.get()
+    if group is not None and group.cancelled:
+        raise JobCancelledError('Job was cancelled')
+
+class FFmpegError(Exception):
+    def __init__(self, returncode, stderr):
+        self.returncode = returncode
+        self.stderr = stderr
+        super().__init__(f'ffmpeg exited with code {returncode}: {stderr[-2000:]}')
+
+def _parse_progress(block: dict) -> dict:
+    """Convert one ``-progress`` block into numbers"""
+    out_time_us = block.get('out_time_us') or block.get('out_time_ms')
+    speed = block.get('speed', '').rstrip('x').strip()
+    try:
+        fps = float(block.get('fps', 0))
+    except ValueError:
+        fps = 0.0
+    return {
+        'out_time_seconds': int(out_time_us) / 1_000_000 if out_time_us and out_time_us.lstrip('-').isdigit() else 0.0,
+        'fps': fps,
+        'speed': float(speed) if speed and speed != 'N/A' else 0.0,
+        'done': block.get('progress') == 'end',
+    }
+
+def run_ffmpeg(args, on_progress=None, nice=0):
+    """
+    Run an ffmpeg command and wait for it to finish.
+
+    The process is tracked so that ``terminate_all`` can stop it when the
+    transcode pool shuts down, and joins the current ``ProcessGroup``.
+
+    Args:
+        args (List[str]): Full command line, e.g. from ``ffmpeg.compile``.
+        on_progress (Callable[[dict], None]): Called with ``out_time_seconds``,
+            ``fps``, ``speed`` and ``done`` every time ffmpeg reports progress.
+        nice (int): Scheduling niceness added to the ffmpeg process.
+
+    Raises:
+        FFmpegError: If ffmpeg exits with a non-zero code.
+        JobCancelledError: If the current process group was terminated.
+    """
+    ensure_active()
+    group = _current_group.get()
+    if on_progress is not None:
+        args = [args[0], '-progress', 'pipe:1', '-nostats'] + list(args[1:])
+    preexec_fn = (lambda: os.nice(nice)) if nice else None
+    process = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               preexec_fn=preexec_fn)
+    with _running_lock:
+        _running.add(process)
+    if group is not None:
+        group.add(process)
+    try:
+        if on_progress is None:
+            _, stderr = process.communicate()
+        else:
+            # Drain stderr in the background so ffmpeg never blocks on a full pipe
+            stderr_chunks = []
+            def drain():
+                for chunk in iter(lambda: process.stderr.read(4096), b''):
+                    stderr_chunks.append(chunk)
+                    if len(stderr_chunks) > STDERR_TAIL // 4096:
+                        stderr_chunks.pop(0)
+            reader = threading.Thread(target=drain, daemon=True)
+            reader.start()
+            block = {}
+            for line in process.stdout:
+                key, _, value = line.decode('utf-8', errors='replace').strip().partition('=')
+                block[key] = value
+                if key == 'progress':
+                    try:
+                        on_progress(_parse_progress(block))
+                    except Exception as e:
+                        logger.error(f'Progress callback failed: {str(e)}')
+                    block = {}
+            process.wait()
+            reader.join()
+            stderr = b''.join(stderr_chunks)
+    finally:
+        with _running_lock:
+            _running.discard(process)
+        if group is not None:
+            group.discard(process)
+    ensure_active()
+    if process.returncode != 0:
+        raise FFmpegError(process.returncode, stderr.decode('utf-8', errors='replace'))
+
+def terminate_all():
+    """Terminate every ffmpeg process started by this interpreter"""
+    with _running_lock:
+        processes = list(_running)
+    for process in processes:
+        logger.warning(f'Terminating ffmpeg process {process.pid}')
+        process.terminate()
@@ -0,0 +1,315 @@
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.probe import avc_codecs_string, first_stream, source_bitrate
+from utils.trickplay import trickplay_filter, trickplay_output_args
+
+# Bitrates are in kbit/s. Renditions taller than the source are skipped.
+RENDITIONS = {
+    '1080p': {'name': '1080p', 'height': 1080, 'video_bitrate': 5000, 'audio_bitrate': 128, 'codecs': 'avc1.640028', 'level': '4.0'},
+    '720p': {'name': '720p', 'height': 720, 'video_bitrate': 2800, 'audio_bitrate': 128, 'codecs': 'avc1.64001f', 'level': '3.1'},
+    '480p': {'name': '480p', 'height': 480, 'video_bitrate': 1400, 'audio_bitrate': 96, 'codecs': 'avc1.64001e', 'level': '3.0'},
+    '360p': {'name': '360p', 'height': 360, 'video_bitrate': 800, 'audio_bitrate': 96, 'codecs': 'avc1.64001e', 'level': '3.0'},
+    'audio': {'name': 'audio', 'height': 0, 'video_bitrate': 0, 'audio_bitrate': 128, 'codecs': None, 'level': None},
+}
+DEFAULT_RENDITIONS = '1080p,720p,480p,audio'
+AUDIO_CODECS = 'mp4a.40.2'
+MASTER_PLAYLIST = 'master.m3u8'
+VARIANT_PLAYLIST = 'index.m3u8'
+SINGLE_FILE_NAME = 'media'
+DASH_MANIFEST = 'manifest.mpd'
+PACKAGINGS = ('hls', 'cmaf')
+
+def parse_ladder(spec: str) -> List[Dict[str, Any]]:
+    """
+    Parse a comma separated list of rendition names, e.g. ``1080p,720p,audio``.
+
+    Raises:
+        ValueError: If a rendition name is unknown.
+    """
+    ladder = []
+    for name in [n.strip() for n in spec.split(',') if n.strip()]:
+        if name not in RENDITIONS:
+            raise ValueError(f'Unknown HLS rendition: {name}')
+        ladder.append(dict(RENDITIONS[name]))
+    return ladder
+
+def source_rendition(probe: Dict[str, Any], audio_plan: Optional[str] = None,
+                     ladder: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Describe the source video as a rendition that is copied instead of encoded.
+
+    The container bitrate covers every stream, so it is never used for the
+    audio track: copied audio keeps its own ``bit_rate`` and re-encoded audio
+    (or copied audio without one, common in MKV) gets the highest audio
+    bitrate of the ladder.
+    """
+    video = first_stream(probe, 'video')
+    audio = first_stream(probe, 'audio')
+    audio_bitrate = max((r['audio_bitrate'] for r in ladder or []), default=0) or RENDITIONS['audio']['audio_bitrate']
+    if audio is None:
+        audio_kbps = 0
+    elif audio_plan == 'copy' and audio.get('bit_rate'):
+        audio_kbps = int(int(audio['bit_rate']) / 1000) or audio_bitrate
+    else:
+        audio_kbps = audio_bitrate
+    video_kbps = source_bitrate(probe, video)
+    if not video.get('bit_rate'):
+        # Container bitrate: leave out the audio so BANDWIDTH does not count it twice
+        video_kbps = max(video_kbps - audio_kbps, 0)
+    return {
+        'name': 'source',
+        'height': int(video['height']),
+        'width': int(video['width']),
+        'video_bitrate': video_kbps,
+        'audio_bitrate': audio_kbps,
+        'codecs': avc_codecs_string(video),
+        'level': None,
+        'copy': True,
+    }
+
+def select_renditions(ladder: List[Dict[str, Any]], width: int, height: int, has_audio: bool,
+                      source: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Fit the ladder to the source: drop upscaling renditions, compute output
+    widths from the source aspect ratio and drop audio when there is none.
+
+    When ``source`` is given the source video is passed through as the top
+    rendition and only smaller rungs are encoded.
+    """
+    if source is not None:
+        video = [r for r in ladder if r['height'] and r['height'] < height]
+    else:
+        video = [r for r in ladder if r['height'] and r['height'] <= height]
+        if not video:
+            # Source is smaller than every rung; encode a single rendition at source size
+            smallest = min((r for r in ladder if r['height']), key=lambda r: r['height'], default=RENDITIONS['480p'])
+            video = [dict(smallest, name=f'{height}p', height=height)]
+    renditions = [dict(source)] if source is not None else []
+    for rendition in sorted(video, key=lambda r: r['height'], reverse=True):
+        rendition = dict(rendition)
+        rendition['width'] = int(round(width * rendition['height'] / height / 2)) * 2
+        renditions.append(rendition)
+    if not has_audio:
+        for rendition in renditions:
+            rendition['audio_bitrate'] = 0
+    else:
+        renditions.extend(dict(r) for r in ladder if not r['height'])
+    return renditions
+
+def _bandwidth(rendition: Dict[str, Any]) -> Dict[str, int]:
+    average = (rendition['video_bitrate'] + rendition['audio_bitrate']) * 1000
+    # Peak allows for the encoder maxrate and container overhead
+    peak = int((rendition['video_bitrate'] * 1.07 + rendition['audio_bitrate']) * 1000 * 1.1)
+    return {'average': average, 'peak': peak}
+
+def _filter_graph(encoded: List[Dict[str, Any]], trickplay: Optional[Dict[str, Any]]) -> List[str]:
+    """Split the decoded video into ``[vo<i>]`` per encoded rendition and ``[tp]`` for trickplay"""
+    branches = len(encoded) + (1 if trickplay else 0)
+    if not branches:
+        return []
+    outputs = ''.join(f'[vs{i}]' for i in range(branches))
+    graph = [f'[0:v]split={branches}{outputs}']
+    for i, rendition in enumerate(encoded):
+        graph.append(f"[vs{i}]scale={rendition['width']}:{rendition['height']}[vo{i}]")
+    if trickplay:
+        graph.append(f'[vs{len(encoded)}]{trickplay_filter(trickplay)}[tp]')
+    return ['-filter_complex', ';'.join(graph)]
+
+def _video_encode_args(index: int, rendition: Dict[str, Any], keyframes: str) -> List[str]:
+    return [
+        f'-c:v:{index}', 'libx264',
+        f'-preset:v:{index}', 'veryfast',
+        f'-profile:v:{index}', 'high',
+        f'-pix_fmt:v:{index}', 'yuv420p',
+        f'-sc_threshold:v:{index}', '0',
+        f'-b:v:{index}', f"{rendition['video_bitrate']}k",
+        f'-maxrate:v:{index}', f"{int(rendition['video_bitrate'] * 1.07)}k",
+        f'-bufsize:v:{index}', f"{int(rendition['video_bitrate'] * 1.5)}k",
+        f'-level:v:{index}', rendition['level'],
+        f'-force_key_frames:v:{index}', keyframes,
+    ]
+
+def build_hls_command(video_path: str, output_dir: str, renditions: List[Dict[str, Any]],
+                      hls_segment_time: int = 10, hls_list_size: int = 0,
+                      hls_segment_type: str = 'fmp4', threads: int = 0,
+                      audio_codec: str = 'aac', trickplay: Optional[Dict[str, Any]] = None,
+                      single_file: bool = False, progressive: bool = False,
+                      start_time: float = 0, audio_tracks: Optional[List[int]] = None) -> List[str]:
+    """
+    Build an ffmpeg command that decodes the source once, splits and scales
+    it into every encoded rendition and writes one HLS playlist per rendition
+    under ``output_dir/<rendition name>/``. Renditions marked ``copy`` are
+    remuxed straight from the input.
+
+    With ``trickplay`` settings the same decode also feeds tiled JPEG sprite
+    sheets into ``output_dir/trickplay/``. With ``single_file`` every
+    rendition is one media file addressed with ``EXT-X-BYTERANGE``. With
+    ``progressive`` the playlists are EVENT playlists, rewritten atomically
+    as segments are flushed so they can be played while ffmpeg runs.
+
+    ``start_time`` is the timestamp of the first frame of an input read with
+    ``-copyts`` (a chunk of a longer source); forced keyframes are counted
+    from it. ``audio_tracks`` lists the bitrates of AAC streams already in
+    the input, in stream order; each rendition copies the stream of its
+    audio bitrate instead of encoding.
+    """
+    video = [r for r in renditions if r['height']]
+    encoded = [r for r in video if not r.get('copy')]
+    audio_only = [r for r in renditions if not r['height']]
+    segment_ext = 'm4s' if hls_segment_type == 'fmp4' else 'ts'
+    # Encoded rungs must cut where the copied source has keyframes to stay switchable
+    offset = f'{start_time:.6f}+' if start_time else ''
+    keyframes = 'source' if len(encoded) < len(video) else f'expr:gte(t,{offset}n_forced*{hls_segment_time})'
+
+    args = ['ffmpeg', '-y', '-i', video_path] + _filter_graph(encoded, trickplay)
+
+    var_stream_map = []
+    audio_index = 0
+
+    def map_audio(rendition):
+        nonlocal audio_index
+        index = audio_index
+        audio_index += 1
+        if audio_tracks:
+            return ['-map', f"0:a:{audio_tracks.index(rendition['audio_bitrate'])}", f'-c:a:{index}', 'copy'], index
+        if audio_codec == 'copy':
+            return ['-map', '0:a:0', f'-c:a:{index}', 'copy'], index
+        return ['-map', '0:a:0', f'-c:a:{index}', 'aac', f'-ac:a:{index}', '2', f'-b:a:{index}', f"{rendition['audio_bitrate']}k"], index
+
+    encoded_index = 0
+    for i, rendition in enumerate(video):
+        if rendition.get('copy'):
+            args += ['-map', '0:v:0', f'-c:v:{i}', 'copy']
+        else:
+            args += ['-map', f'[vo{encoded_index}]'] + _video_encode_args(i, rendition, keyframes)
+            encoded_index += 1
+        entry = f"v:{i}"
+        if rendition['audio_bitrate']:
+            audio_args, index = map_audio(rendition)
+            args += audio_args
+            entry += f',a:{index}'
+        var_stream_map.append(f"{entry},name:{rendition['name']}")
+    for rendition in audio_only:
+        audio_args, index = map_audio(rendition)
+        args += audio_args
+        var_stream_map.append(f"a:{index},name:{rendition['name']}")
+
+    args += [
+        '-threads', str(threads),
+        '-f', 'hls',
+        '-start_number', '0',
+        '-hls_time', str(hls_segment_time),
+        '-hls_list_size', str(hls_list_size),
+        '-hls_segment_type', hls_segment_type,
+        '-hls_flags', '+'.join(['independent_segments'] + (['single_file'] if single_file else []) + (['temp_file'] if progressive else [])),
+        '-hls_segment_filename', os.path.join(output_dir, '%v', f'{SINGLE_FILE_NAME}.{segment_ext}' if single_file else f'seg_%05d.{segment_ext}'),
+        '-var_stream_map', ' '.join(var_stream_map),
+    ]
+    if progressive:
+        args += ['-hls_playlist_type', 'event']
+    if hls_segment_type == 'fmp4':
+        args += ['-hls_fmp4_init_filename', 'init_%v.mp4']
+    args.append(os.path.join(output_dir, '%v', VARIANT_PLAYLIST))
+    if trickplay:
+        args += trickplay_output_args(output_dir, 'tp')
+    return args
+
+def build_cmaf_command(video_path: str, output_dir: str, renditions: List[Dict[str, Any]],
+                       segment_time: int = 4, threads: int = 0, audio_codec: str = 'aac',
+                       trickplay: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Build an ffmpeg command that packages the ladder once as CMAF: a single
+    set of fMP4 segments in ``output_dir`` referenced by both ``manifest.mpd``
+    (DASH) and ``master.m3u8`` with its ``media_<n>.m3u8`` playlists (HLS).
+
+    Audio is encoded once as its own adaptation set / rendition group instead
+    of being muxed into every video rendition.
+    """
+    video = [r for r in renditions if r['height']]
+    encoded = [r for r in video if not r.get('copy')]
+    audio_bitrate = max((r['audio_bitrate'] for r in renditions), default=0)
+    keyframes = 'source' if len(encoded) < len(video) else f'expr:gte(t,n_forced*{segment_time})'
+
+    args = ['ffmpeg', '-y', '-i', video_path] + _filter_graph(encoded, trickplay)
+    encoded_index = 0
+    for i, rendition in enumerate(video):
+        if rendition.get('copy'):
+            args += ['-map', '0:v:0', f'-c:v:{i}', 'copy']
+        else:
+            args += ['-map', f'[vo{encoded_index}]'] + _video_encode_args(i, rendition, keyframes)
+            encoded_index += 1
+    adaptation_sets = ['id=0,streams=v']
+    if audio_bitrate:
+        args += ['-map', '0:a:0']
+        args += ['-c:a', 'copy'] if audio_codec == 'copy' else ['-c:a', 'aac', '-ac', '2', '-b:a', f'{audio_bitrate}k']
+        adaptation_sets.append('id=1,streams=a')
+
+    args += [
+        '-threads', str(threads),
+        '-f', 'dash',
+        '-seg_duration', str(segment_time),
+        '-use_template', '1',
+        '-use_timeline', '1',
+        '-dash_segment_type', 'mp4',
+        '-init_seg_name', 'init_$RepresentationID$.m4s',
+        '-media_seg_name', 'seg_$RepresentationID$_$Number%05d$.m4s',
+        '-adaptation_sets', ' '.join(adaptation_sets),
+        '-hls_playlist', '1',
+        os.path.join(output_dir, DASH_MANIFEST),
+    ]
+    if trickplay:
+        args += trickplay_output_args(output_dir, 'tp')
+    return args
+
+def write_master_playlist(output_dir: str, renditions: List[Dict[str, Any]], hls_segment_type: str = 'fmp4') -> str:
+    """
+    Write ``master.m3u8`` referencing every rendition playlist.
+
+    Returns:
+        str: Path of the master playlist.
+    """
+    lines = ['#EXTM3U', f"#EXT-X-VERSION:{7 if hls_segment_type == 'fmp4' else 3}", '#EXT-X-INDEPENDENT-SEGMENTS']
+    for rendition in renditions:
+        bandwidth = _bandwidth(rendition)
+        attributes = [f"BANDWIDTH={bandwidth['peak']}", f"AVERAGE-BANDWIDTH={bandwidth['average']}"]
+        codecs = [c for c in (rendition.get('codecs'), AUDIO_CODECS if rendition['audio_bitrate'] else None) if c]
+        if rendition['height']:
+            attributes.append(f"RESOLUTION={rendition['width']}x{rendition['height']}")
+        attributes.append(f'CODECS="{",".join(codecs)}"')
+        lines.append(f"#EXT-X-STREAM-INF:{','.join(attributes)}")
+        lines.append(f"{rendition['name']}/{VARIANT_PLAYLIST}")
+
+    master_path = os.path.join(output_dir, MASTER_PLAYLIST)
+    with open(master_path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return master_path
+
+def is_streamable(output_dir: str, renditions: List[Dict[str, Any]], min_segments: int = 1) -> bool:
+    """True once every rendition playlist lists at least ``min_segments`` segments"""
+    for rendition in renditions:
+        try:
+            with open(os.path.join(output_dir, rendition['name'], VARIANT_PLAYLIST)) as f:
+                if f.read().count('#EXTINF') < min_segments:
+                    return False
+        except FileNotFoundError:
+            return False
+    return True
+
+def streamable_callback(output_dir: str, renditions: List[Dict[str, Any]], min_segments: int,
+                        on_streamable: Callable[[], None],
+                        on_progress: Optional[Callable[[dict], None]] = None) -> Callable[[dict], None]:
+    """
+    Progress callback for a progressive transcode that calls
+    ``on_streamable`` once, as soon as every rendition can be played.
+    """
+    announced = False
+
+    def report(data):
+        nonlocal announced
+        if on_progress is not None:
+            on_progress(data)
+        if not announced and is_streamable(output_dir, renditions, min_segments):
+            announced = True
+            on_streamable()
+    return report
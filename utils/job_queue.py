@@ -0,0 +1,222 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import logging
+
+from pymongo import ReturnDocument
+
+from models.job_model import TranscodeJob
+
+logger = logging.getLogger(__name__)
+
+class JobQueue:
+    """
+    Durable job queue stored in the ``transcode_jobs`` collection.
+
+    Workers claim a job atomically and hold a lease on it. The lease is
+    extended by heartbeats while the job runs; when a worker dies its lease
+    expires and the job is put back in the queue (or failed once it has
+    used up ``max_attempts``), so any replica can pick it up.
+    """
+
+    def __init__(self, db, lease_seconds: int = 60, max_attempts: int = 3, retry_delay: int = 30):
+        self.collection = db.transcode_jobs
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def enqueue(self, job: TranscodeJob) -> str:
+        job.max_attempts = self.max_attempts
+        self.collection.insert_one(job.to_bson())
+        return job.uuid
+
+    def backlog(self, priority: str = None) -> int:
+        query = {'status': 'queued'}
+        if priority is not None:
+            query['priority'] = priority
+        return self.collection.count_documents(query)
+
+    def claim(self, worker_id: str, priorities: List[str] = None) -> Optional[dict]:
+        """
+        Atomically take the next job and lease it to ``worker_id``.
+
+        Priority classes are tried in the given order. Within a class the
+        owner with the fewest running jobs goes first, so one uploader's bulk
+        import cannot starve everyone else; each owner's jobs run oldest first.
+        """
+        if priorities is None:
+            return self._claim(worker_id, {})
+        for priority in priorities:
+            for owner in self._owners_by_fairness(priority):
+                job = self._claim(worker_id, {'priority': priority, 'owner': owner})
+                if job is not None:
+                    return job
+        return None
+
+    def _owners_by_fairness(self, priority: str) -> list:
+        now = datetime.now(timezone.utc)
+        waiting = list(self.collection.aggregate([
+            {'$match': {'status': 'queued', 'priority': priority, 'available_at': {'$lte': now}}},
+            {'$group': {'_id': '$owner', 'oldest': {'$min': '$created_at'}}},
+        ]))
+        if not waiting:
+            return []
+        running = {
+            row['_id']: row['count']
+            for row in self.collection.aggregate([
+                {'$match': {'status': 'running', 'owner': {'$in': [row['_id'] for row in waiting]}}},
+                {'$group': {'_id': '$owner', 'count': {'$sum': 1}}},
+            ])
+        }
+        waiting.sort(key=lambda row: (running.get(row['_id'], 0), row['oldest']))
+        return [row['_id'] for row in waiting]
+
+    def _claim(self, worker_id: str, criteria: dict) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        return self.collection.find_one_and_update(
+            {'status': 'queued', 'available_at': {'$lte': now}, **criteria},
+            {
+                '$set': {
+                    'status': 'running',
+                    'worker_id': worker_id,
+                    'lease_expires_at': now + timedelta(seconds=self.lease_seconds),
+                    'heartbeat_at': now,
+                    'started_at': now,
+                    'updated_at': now,
+                },
+                '$inc': {'attempts': 1},
+            },
+            sort=[('available_at', 1), ('created_at', 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def heartbeat(self, job_uuid: str, worker_id: str) -> bool:
+        """Extend the lease; returns False if the job is no longer held by ``worker_id``"""
+        now = datetime.now(timezone.utc)
+        result = self.collection.update_one(
+            {'uuid': job_uuid, 'status': 'running', 'worker_id': worker_id},
+            {'$set': {
+                'lease_expires_at': now + timedelta(seconds=self.lease_seconds),
+                'heartbeat_at': now,
+                'updated_at': now,
+            }}
+        )
+        return result.matched_count > 0
+
+    def update_progress(self, job_uuid: str, worker_id: str, progress: dict) -> bool:
+        """Store transcode progress; also extends the lease like a heartbeat"""
+        now = datetime.now(timezone.utc)
+        result = self.collection.update_one(
+            {'uuid': job_uuid, 'status': 'running', 'worker_id': worker_id},
+            {'$set': {
+                'progress': progress,
+                'lease_expires_at': now + timedelta(seconds=self.lease_seconds),
+                'heartbeat_at': now,
+                'updated_at': now,
+            }}
+        )
+        return result.matched_count > 0
+
+    def complete(self, job_uuid: str, worker_id: str, result: dict = None) -> bool:
+        now = datetime.now(timezone.utc)
+        update = self.collection.update_one(
+            {'uuid': job_uuid, 'worker_id': worker_id},
+            {
+                '$set': {'status': 'completed', 'result': result or {}, 'finished_at': now, 'updated_at': now, 'progress.percent': 100.0, 'progress.eta_seconds': 0},
+                '$unset': {'lease_expires_at': '', 'error': ''},
+            }
+        )
+        return update.matched_count > 0
+
+    def fail(self, job_uuid: str, worker_id: str, error: str) -> Optional[dict]:
+        """
+        Record a failed attempt. The job is retried after ``retry_delay``
+        seconds until it has used up its attempts.
+
+        Returns:
+            Optional[dict]: The updated job, or None if the lease was lost.
+        """
+        job = self.collection.find_one({'uuid': job_uuid, 'worker_id': worker_id, 'status': 'running'})
+        if job is None:
+            return None
+        now = datetime.now(timezone.utc)
+        if job['attempts'] >= job.get('max_attempts', self.max_attempts):
+            update = {'status': 'failed', 'finished_at': now}
+        else:
+            update = {'status': 'queued', 'available_at': now + timedelta(seconds=self.retry_delay)}
+        update.update({'error': error, 'updated_at': now})
+        return self.collection.find_one_and_update(
+            {'uuid': job_uuid, 'worker_id': worker_id, 'status': 'running'},
+            {'$set': update, '$unset': {'lease_expires_at': ''}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def release(self, job_uuid: str, worker_id: str) -> bool:
+        """Give a job back to the queue without counting the attempt, e.g. on shutdown"""
+        now = datetime.now(timezone.utc)
+        result = self.collection.update_one(
+            {'uuid': job_uuid, 'worker_id': worker_id, 'status': 'running'},
+            {
+                '$set': {'status': 'queued', 'available_at': now, 'updated_at': now},
+                '$unset': {'lease_expires_at': '', 'worker_id': ''},
+                '$inc': {'attempts': -1},
+            }
+        )
+        return result.modified_count > 0
+
+    def find(self, uuid: str) -> list:
+        """Jobs of a content item, or the job with this uuid"""
+        return list(self.collection.find({'$or': [{'content_uuid': uuid}, {'uuid': uuid}]}, {'payload': 0}).sort('created_at', 1))
+
+    def find_many(self, uuids: List[str]) -> Dict[str, list]:
+        """``find`` for several uuids with one query, keyed by uuid"""
+        found = {uuid: [] for uuid in uuids}
+        cursor = self.collection.find(
+            {'$or': [{'content_uuid': {'$in': uuids}}, {'uuid': {'$in': uuids}}]},
+            {'payload': 0}
+        ).sort('created_at', 1)
+        for job in cursor:
+            for key in {job['uuid'], job.get('content_uuid')}:
+                if key in found:
+                    found[key].append(job)
+        return found
+
+    def counts(self) -> dict:
+        counts = {}
+        for row in self.collection.aggregate([{'$group': {'_id': {'status': '$status', 'priority': '$priority'}, 'count': {'$sum': 1}}}]):
+            status, priority = row['_id'].get('status'), row['_id'].get('priority') or 'interactive'
+            counts.setdefault(status, {'total': 0})
+            counts[status]['total'] += row['count']
+            counts[status][priority] = counts[status].get(priority, 0) + row['count']
+        return counts
+
+    def cleanup(self, older_than_seconds: int) -> int:
+        """Delete finished jobs older than ``older_than_seconds``"""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=older_than_seconds)
+        result = self.collection.delete_many({'status': {'$in': ['completed', 'failed']}, 'finished_at': {'$lt': cutoff}})
+        return result.deleted_count
+
+    def reap_expired(self) -> list:
+        """
+        Requeue running jobs whose lease has expired.
+
+        Returns:
+            list: Jobs that were marked as failed because they have no
+            attempts left.
+        """
+        now = datetime.now(timezone.utc)
+        failed = []
+        for job in self.collection.find({'status': 'running', 'lease_expires_at': {'$lt': now}}):
+            logger.warning(f"Lease expired for job {job['uuid']} held by {job.get('worker_id')}")
+            if job['attempts'] >= job.get('max_attempts', self.max_attempts):
+                update = {'status': 'failed', 'finished_at': now, 'error': 'Lease expired'}
+            else:
+                update = {'status': 'queued', 'available_at': now}
+            update['updated_at'] = now
+            reaped = self.collection.find_one_and_update(
+                {'uuid': job['uuid'], 'status': 'running', 'lease_expires_at': job['lease_expires_at']},
+                {'$set': update, '$unset': {'lease_expires_at': '', 'worker_id': ''}},
+                return_document=ReturnDocument.AFTER
+            )
+            if reaped is not None and reaped['status'] == 'failed':
+                failed.append(reaped)
+        return failed
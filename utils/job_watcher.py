@@ -0,0 +1,87 @@
+import threading
+import time
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+class JobWatcher:
+    """
+    Shared poller behind the long-poll and event stream progress endpoints.
+
+    One background thread reads the jobs of every uuid a request is waiting
+    on with a single query each ``interval`` seconds and wakes the waiting
+    requests when they change, so the database load does not grow with the
+    number of open connections. The thread stops when nobody is watching.
+    """
+
+    def __init__(self, jobs, interval: float = 1.0):
+        self.jobs = jobs
+        self.interval = interval
+        self._condition = threading.Condition()
+        self._watchers = defaultdict(int)
+        # uuid -> (version, jobs); the version is bumped whenever the jobs change
+        self._state = {}
+        self._thread = None
+
+    @contextmanager
+    def watching(self, uuid: str):
+        """Keep ``uuid`` in the shared poll while the block runs"""
+        with self._condition:
+            self._watchers[uuid] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll, name='job-watcher', daemon=True)
+                self._thread.start()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._watchers[uuid] -= 1
+                if not self._watchers[uuid]:
+                    del self._watchers[uuid]
+                    self._state.pop(uuid, None)
+
+    def wait(self, uuid: str, version: int, timeout: float) -> Tuple[int, Optional[List[dict]]]:
+        """
+        Block until the jobs of ``uuid`` change after ``version`` or
+        ``timeout`` seconds pass. Only call it inside ``watching(uuid)``.
+
+        Returns:
+            Tuple[int, Optional[List[dict]]]: The latest version and jobs;
+            the jobs are None until the first poll has read them.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._state.get(uuid, (0, None))[0] <= version:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return self._state.get(uuid, (0, None))
+
+    def _poll(self):
+        while True:
+            with self._condition:
+                uuids = list(self._watchers)
+                if not uuids:
+                    self._thread = None
+                    return
+            try:
+                found = self.jobs.find_many(uuids)
+            except PyMongoError as e:
+                logger.error(f'Unable to poll transcode jobs: {str(e)}')
+                found = None
+            if found is not None:
+                with self._condition:
+                    for uuid in uuids:
+                        if uuid not in self._watchers:
+                            continue
+                        version, jobs = self._state.get(uuid, (0, None))
+                        if found[uuid] != jobs:
+                            self._state[uuid] = (version + 1, found[uuid])
+                    self._condition.notify_all()
+            time.sleep(self.interval)
@@ -0,0 +1,111 @@
+from datetime import datetime, timezone
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from bson.objectid import ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+_COMPACT = (',', ':')
+
+_DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+def _http_date(value: datetime) -> str:
+    """``werkzeug.http.http_date`` for a datetime (naive means UTC), without the email.utils round trip"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return (
+        f'{_DAYS[value.weekday()]}, {value.day:02d} {_MONTHS[value.month - 1]} {value.year:04d} '
+        f'{value.hour:02d}:{value.minute:02d}:{value.second:02d} GMT'
+    )
+
+_NUMBER = frozenset(b'0123456789.-')
+_DIGITS = frozenset(b'0123456789')
+# Digits and minus signs folded to 0, so one search finds every <digit>e<digit or minus>
+_FOLD_NUMBERS = bytes.maketrans(b'123456789-', b'0000000000')
+
+def _is_exponent(output: bytes, index: int) -> bool:
+    """Whether the ``e`` at ``index`` is the exponent of a JSON number"""
+    end = index + 1
+    if output[end:end + 1] == b'-':
+        end += 1
+    if end >= len(output) or output[end] not in _DIGITS:
+        return False
+    while end < len(output) and output[end] in _DIGITS:
+        end += 1
+    if end < len(output) and output[end] not in b',]}':
+        return False
+    start = index - 1
+    while start >= 0 and output[start] in _NUMBER:
+        start -= 1
+    return start < 0 or output[start] in b':,['
+
+def _stdlib_floats_differ(output: bytes) -> bool:
+    """
+    orjson writes exponents as 1e-5 and 1e16 where the stdlib encoder writes
+    1e-05 and 1e+16, and some small floats as 0.00001. Scanned with
+    ``bytes.translate`` and ``bytes.find``, which is much faster than a
+    regular expression over a large response; a candidate only counts if it
+    is a whole number, so hex ids such as ``..4e8..`` in uuids do not.
+    """
+    if b'0.0000' in output:
+        return True
+    folded = output.translate(_FOLD_NUMBERS)
+    index = folded.find(b'0e0')
+    while index != -1:
+        if _is_exponent(output, index + 1):
+            return True
+        index = folded.find(b'0e0', index + 2)
+    return False
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask's JSON provider with ObjectId support and, when orjson is
+    installed, orjson for compact output (every ``jsonify`` and dict
+    response outside debug mode).
+
+    The output is byte for byte what the default provider writes: keys are
+    sorted, dates go through the same ``default``, and a result orjson
+    would write differently (non-ASCII text, which the default escapes,
+    DEL, floats with an exponent, integers beyond 64 bits, non-string keys) is encoded
+    with the stdlib instead. The one exception is NaN and Infinity, which
+    the stdlib writes as invalid JSON and orjson as ``null``.
+    """
+
+    @staticmethod
+    def default(o: Any) -> Any:
+        if isinstance(o, datetime):
+            return _http_date(o)
+        if isinstance(o, ObjectId):
+            return str(o)
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is not None and kwargs == {'separators': _COMPACT} and self.ensure_ascii and self.sort_keys:
+            try:
+                output = orjson.dumps(
+                    obj,
+                    default=self.default,
+                    option=orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+                )
+            except TypeError:
+                output = None
+            if output is not None and output.isascii() and b'\x7f' not in output and not _stdlib_floats_differ(output):
+                return output.decode('ascii')
+        return super().dumps(obj, **kwargs)
+
+def compact_dumps(provider: DefaultJSONProvider, obj: Any) -> str:
+    """
+    ``provider.dumps`` with the separators ``jsonify`` uses outside debug
+    mode, the call ``FastJSONProvider`` encodes with orjson. Routes that
+    render JSON themselves (cached or streamed bodies) use this.
+    """
+    return provider.dumps(obj, separators=_COMPACT)
+
+def json_body(provider: DefaultJSONProvider, obj: Any) -> str:
+    """A whole response body, byte for byte what ``jsonify`` writes outside debug mode"""
+    return compact_dumps(provider, obj) + '\n'
@@ -0,0 +1,76 @@
+import os
+from typing import Optional
+
+from werkzeug.security import safe_join
+
+# Content types of everything the transcoder writes
+MEDIA_TYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.mpd': 'application/dash+xml',
+    '.m4s': 'video/iso.segment',
+    '.mp4': 'video/mp4',
+    '.m4a': 'audio/mp4',
+    '.ts': 'video/mp2t',
+    '.aac': 'audio/aac',
+    '.vtt': 'text/vtt',
+    '.jpg': 'image/jpeg',
+}
+# Manifests change while a transcode runs; everything else is written once
+MANIFEST_EXTENSIONS = {'.m3u8', '.mpd', '.vtt'}
+OFFLOAD_MODES = ('', 'x-accel', 'x-sendfile')
+
+def media_type(path: str) -> Optional[str]:
+    return MEDIA_TYPES.get(os.path.splitext(path)[1].lower())
+
+def is_manifest(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in MANIFEST_EXTENSIONS
+
+def is_hot(path: str) -> bool:
+    """Manifests and init segments, which every player of a title fetches first"""
+    name = os.path.basename(path)
+    return is_manifest(path) or (name.startswith('init') and name.endswith(('.mp4', '.m4s')))
+
+def cache_control(path: str, manifest_max_age: int, segment_max_age: int) -> str:
+    """Short TTL for manifests, long-lived and immutable for segments"""
+    if is_manifest(path):
+        return f'public, max-age={manifest_max_age}'
+    return f'public, max-age={segment_max_age}, immutable'
+
+def relative_media_path(root: str, file_path: str) -> Optional[str]:
+    """
+    Path of a catalog ``file_path`` relative to ``root``. Like ``root``, a
+    relative ``file_path`` is relative to the working directory, because
+    that is how the transcoder wrote it. The file does not have to exist.
+    """
+    root = os.path.realpath(root)
+    path = os.path.realpath(os.path.abspath(file_path))
+    if not path.startswith(root + os.sep):
+        return None
+    return os.path.relpath(path, root)
+
+def resolve_media_path(root: str, requested: str) -> Optional[str]:
+    """
+    Map a stream URL path to a file under ``root``.
+
+    Catalog entries store the path the transcoder wrote: absolute
+    (``/code/uploads/...``) or relative to the working directory
+    (``uploads/...``) when ``UPLOAD_FOLDER`` is relative. The requested
+    path may repeat either form or be relative to ``root``. Anything that
+    resolves outside ``root`` is rejected.
+
+    Returns:
+        Optional[str]: Path relative to ``root``, or None if it does not exist.
+    """
+    root = os.path.realpath(root)
+    candidates = [requested]
+    for absolute in (os.path.realpath(requested.lstrip('/')), os.path.realpath('/' + requested.lstrip('/'))):
+        if absolute.startswith(root + os.sep):
+            candidates.insert(0, os.path.relpath(absolute, root))
+    for candidate in candidates:
+        path = safe_join(root, candidate)
+        if path is None:
+            continue
+        path = os.path.realpath(path)
+        if path.startswith(root + os.sep) and os.path.isfile(path):
+            return os.path.relpath(path, root)
+    return None
@@ -0,0 +1,115 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from bson.objectid import ObjectId
+
+MAX_PAGE_SIZE = 500
+
+class CursorError(ValueError):
+    pass
+
+def _encode_value(value):
+    if isinstance(value, ObjectId):
+        return {'$oid': str(value)}
+    if isinstance(value, datetime):
+        return {'$date': value.isoformat()}
+    return value
+
+def _decode_value(value):
+    if isinstance(value, dict) and '$oid' in value:
+        return ObjectId(value['$oid'])
+    if isinstance(value, dict) and '$date' in value:
+        return datetime.fromisoformat(value['$date'])
+    return value
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Opaque, URL safe cursor holding the sort key values of the last item of a page"""
+    raw = json.dumps({key: _encode_value(value) for key, value in values.items()}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).rstrip(b'=').decode('ascii')
+
+def decode_cursor(cursor: str, keys: List[str]) -> Dict[str, Any]:
+    """
+    Raises:
+        CursorError: If the cursor is malformed or was made for other keys.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = {key: _decode_value(value) for key, value in json.loads(raw).items()}
+    except (ValueError, TypeError) as e:
+        raise CursorError('Invalid cursor') from e
+    if set(values) != set(keys):
+        raise CursorError('Invalid cursor')
+    return values
+
+def keyset_filter(sort: List[Tuple[str, int]], after: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Query for the documents after ``after`` in ``sort`` order, e.g. for
+    ``[('created_at', -1), ('_id', -1)]``::
+
+        {'$or': [{'created_at': {'$lt': c}},
+                 {'created_at': c, '_id': {'$lt': i}}]}
+    """
+    clauses = []
+    for index, (key, direction) in enumerate(sort):
+        clause = {prior: after[prior] for prior, _ in sort[:index]}
+        clause[key] = {'$gt' if direction > 0 else '$lt': after[key]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {'$or': clauses}
+
+def page_size(value: Optional[str], default: int = 50) -> int:
+    """
+    Raises:
+        ValueError: If ``value`` is not a positive integer.
+    """
+    size = int(value) if value is not None else default
+    if size <= 0:
+        raise ValueError('limit must be positive')
+    return min(size, MAX_PAGE_SIZE)
+
+def json_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def _dumps(value) -> str:
+    return json.dumps(value, default=json_default)
+
+def _page(documents: Iterable[Dict[str, Any]], limit: int, sort_keys: List[str],
+          transform: Callable[[Dict[str, Any]], Dict[str, Any]], state: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Yield up to ``limit`` items and leave the cursor of the next page in ``state``"""
+    last = None
+    for count, document in enumerate(documents):
+        if count == limit:
+            state['next_cursor'] = encode_cursor({key: last[key] for key in sort_keys})
+            return
+        last = document
+        yield transform(document)
+
+def stream_json_page(documents: Iterable[Dict[str, Any]], limit: int, sort_keys: List[str],
+                     transform: Callable[[Dict[str, Any]], Dict[str, Any]], dumps: Callable[[Any], str] = _dumps,
+                     meta: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+    """
+    Stream one page as ``{"status": "success", "data": [...], "next_cursor": ...}``
+    while reading ``documents`` (which should hold ``limit + 1`` items), so
+    only one document is in memory at a time. Every item is encoded with
+    ``dumps``; pass the app's JSON provider to match ``jsonify``.
+    """
+    state = {'next_cursor': None}
+    yield '{"status":"success","data":['
+    for index, item in enumerate(_page(documents, limit, sort_keys, transform, state)):
+        yield (',' if index else '') + dumps(item)
+    tail = dict(meta or {}, next_cursor=state['next_cursor'])
+    yield '],' + dumps(tail)[1:]
+
+def stream_ndjson_page(documents: Iterable[Dict[str, Any]], limit: int, sort_keys: List[str],
+                       transform: Callable[[Dict[str, Any]], Dict[str, Any]], dumps: Callable[[Any], str] = _dumps,
+                       meta: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+    """Stream one page as one JSON object per line, ending with a ``{"next_cursor": ...}`` line"""
+    state = {'next_cursor': None}
+    for item in _page(documents, limit, sort_keys, transform, state):
+        yield dumps(item) + '\n'
+    yield dumps(dict(meta or {}, next_cursor=state['next_cursor'])) + '\n'
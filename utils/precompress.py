@@ -0,0 +1,108 @@
+import gzip
+import os
+import logging
+from typing import List, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from utils.media_files import is_manifest
+
+logger = logging.getLogger(__name__)
+
+# Preferred first when the client accepts several
+ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+
+def available_encodings() -> List[str]:
+    return [encoding for encoding in ENCODINGS if encoding != 'br' or brotli is not None]
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, mode=brotli.MODE_TEXT, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def precompress_file(path: str) -> List[str]:
+    """
+    Write ``.br``/``.gz`` variants next to ``path``. A variant that would
+    not be smaller than the original is removed instead.
+
+    Returns:
+        List[str]: Encodings written.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    written = []
+    for encoding in available_encodings():
+        target = path + ENCODINGS[encoding]
+        compressed = _compress(data, encoding)
+        if len(compressed) >= len(data):
+            if os.path.exists(target):
+                os.remove(target)
+            continue
+        tmp_path = target + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, target)
+        written.append(encoding)
+    return written
+
+def precompress_manifests(output_dir: str) -> int:
+    """
+    Precompress every playlist, manifest and WebVTT track of a finished
+    transcode so ``stream_video`` never compresses per request.
+
+    Returns:
+        int: Number of variants written.
+    """
+    count = 0
+    for directory, _, files in os.walk(output_dir):
+        for name in files:
+            if is_manifest(name):
+                try:
+                    count += len(precompress_file(os.path.join(directory, name)))
+                except OSError as e:
+                    logger.error(f'Unable to precompress {name}: {str(e)}')
+    return count
+
+def _accepted(accept_encoding: str) -> dict:
+    accepted = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.lower()] = quality
+    return accepted
+
+def precompressed_variant(path: str, accept_encoding: str) -> Optional[tuple]:
+    """
+    Pick the best precompressed variant of ``path`` the client accepts.
+    Variants older than the file itself are ignored.
+
+    Returns:
+        Optional[tuple]: ``(encoding, variant path)``, or None to send the
+        file uncompressed.
+    """
+    if not accept_encoding:
+        return None
+    accepted = _accepted(accept_encoding)
+    mtime = None
+    for encoding, extension in ENCODINGS.items():
+        if accepted.get(encoding, accepted.get('*', 0.0)) <= 0:
+            continue
+        variant = path + extension
+        try:
+            if mtime is None:
+                mtime = os.stat(path).st_mtime_ns
+            if os.stat(variant).st_mtime_ns >= mtime:
+                return encoding, variant
+        except FileNotFoundError:
+            continue
+    return None
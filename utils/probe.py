@@ -0,0 +1,97 @@
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from ffmpeg import probe as ffprobe
+
+# Sources in these formats play everywhere HLS does and can be remuxed as-is
+PASSTHROUGH_VIDEO_PROFILES = {'High', 'Main', 'Constrained Baseline', 'Baseline'}
+PASSTHROUGH_PIX_FMTS = {'yuv420p', 'yuvj420p'}
+PASSTHROUGH_AUDIO_PROFILES = {'LC', 'HE-AAC', 'HE-AACv2'}
+AVC_PROFILE_IDC = {'Baseline': 0x42, 'Constrained Baseline': 0x42, 'Main': 0x4d, 'High': 0x64}
+
+def first_stream(probe: Dict[str, Any], codec_type: str) -> Optional[Dict[str, Any]]:
+    return next((s for s in probe.get('streams', []) if s.get('codec_type') == codec_type), None)
+
+def avc_codecs_string(stream: Dict[str, Any]) -> str:
+    """RFC 6381 codecs string for an H.264 stream, e.g. ``avc1.640028``"""
+    profile = stream.get('profile', 'High')
+    constraints = 0x40 if profile == 'Constrained Baseline' else 0x00
+    level = int(stream.get('level') or 40)
+    return f'avc1.{AVC_PROFILE_IDC.get(profile, 0x64):02x}{constraints:02x}{level:02x}'
+
+def plan_transcode(probe: Dict[str, Any], passthrough: bool = True) -> Dict[str, Any]:
+    """
+    Decide per stream whether the source can be copied or must be encoded.
+
+    Args:
+        probe (Dict[str, Any]): ffprobe output for the source.
+        passthrough (bool): Allow copying compatible streams.
+
+    Returns:
+        Dict[str, Any]: ``video`` is ``copy`` or ``encode``, ``audio`` is
+        ``copy``, ``aac`` or None when there is no audio, and ``mode``
+        summarises the decision as ``remux`` (copy everything), ``audio``
+        (copy video, transcode audio) or ``encode``.
+    """
+    video = first_stream(probe, 'video')
+    audio = first_stream(probe, 'audio')
+
+    video_copy = passthrough and video is not None \
+        and video.get('codec_name') == 'h264' \
+        and video.get('profile') in PASSTHROUGH_VIDEO_PROFILES \
+        and video.get('pix_fmt') in PASSTHROUGH_PIX_FMTS
+    if audio is None:
+        audio_plan = None
+    elif passthrough and audio.get('codec_name') == 'aac' and audio.get('profile') in PASSTHROUGH_AUDIO_PROFILES:
+        audio_plan = 'copy'
+    else:
+        # AC3/DTS and friends do not play in most browsers
+        audio_plan = 'aac'
+
+    if video_copy and audio_plan in ('copy', None):
+        mode = 'remux'
+    elif video_copy:
+        mode = 'audio'
+    else:
+        mode = 'encode'
+    return {'mode': mode, 'video': 'copy' if video_copy else 'encode', 'audio': audio_plan}
+
+def source_bitrate(probe: Dict[str, Any], stream: Dict[str, Any]) -> int:
+    """Bitrate of a stream in kbit/s, falling back to the container bitrate"""
+    bit_rate = stream.get('bit_rate') or probe.get('format', {}).get('bit_rate') or 0
+    return int(int(bit_rate) / 1000)
+
+@lru_cache(maxsize=256)
+def _cached_probe(path: str, size: int, mtime_ns: int) -> Dict[str, Any]:
+    return ffprobe(path)
+
+def probe_media(path: str) -> Dict[str, Any]:
+    """
+    Run ffprobe once per file version. Results are cached by path, size
+    and modification time, so repeated calls for the same upload are free.
+    """
+    stat = os.stat(path)
+    return _cached_probe(path, stat.st_size, stat.st_mtime_ns)
+
+def media_summary(probe: Dict[str, Any]) -> Dict[str, Any]:
+    """Pick the fields stored on the catalog entry from an ffprobe result"""
+    video = first_stream(probe, 'video') or {}
+    audio = first_stream(probe, 'audio') or {}
+    format_ = probe.get('format', {})
+    frame_rate = None
+    if video.get('avg_frame_rate') and video['avg_frame_rate'] != '0/0':
+        numerator, _, denominator = video['avg_frame_rate'].partition('/')
+        frame_rate = round(int(numerator) / int(denominator or 1), 3)
+    return {
+        'duration_seconds': float(format_['duration']) if format_.get('duration') else None,
+        'format_name': format_.get('format_name'),
+        'bit_rate': int(format_['bit_rate']) if format_.get('bit_rate') else None,
+        'video_codec': video.get('codec_name'),
+        'video_profile': video.get('profile'),
+        'width': video.get('width'),
+        'height': video.get('height'),
+        'frame_rate': frame_rate,
+        'audio_codec': audio.get('codec_name'),
+        'audio_channels': audio.get('channels'),
+    }
@@ -0,0 +1,65 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+class ProgressTracker:
+    """
+    Turn ffmpeg progress reports into percent done, encode fps/speed and
+    ETA for a job, and publish them at most every ``interval`` seconds.
+
+    Several ffmpeg processes (e.g. the chunks of one job) can report under
+    their own key; their processed time, fps and speed are summed.
+    """
+
+    def __init__(self, duration: float, publish: Callable[[Dict[str, Any]], None], interval: float = 2.0):
+        self.duration = duration
+        self.publish = publish
+        self.interval = interval
+        self._reports = {}
+        self._last_publish = 0.0
+        self._lock = threading.Lock()
+
+    def callback(self, key: Any = None, offset: float = 0.0, length: Optional[float] = None) -> Callable[[dict], None]:
+        """
+        Progress callback for one ffmpeg process.
+
+        Args:
+            key: Identifies the process when several report together.
+            offset (float): Media time at which this process starts, for
+                processes that keep the source timestamps.
+            length (float): Media duration handled by this process.
+        """
+        def report(data):
+            processed = max(0.0, data['out_time_seconds'] - offset)
+            if data['done'] and length is not None:
+                processed = length
+            elif length is not None:
+                processed = min(processed, length)
+            self.update(key, dict(data, processed_seconds=processed))
+        return report
+
+    def update(self, key, data: Dict[str, Any]):
+        with self._lock:
+            self._reports[key] = data
+            now = time.monotonic()
+            if now - self._last_publish < self.interval:
+                return
+            self._last_publish = now
+            snapshot = self.snapshot()
+        self.publish(snapshot)
+
+    def snapshot(self) -> Dict[str, Any]:
+        reports = list(self._reports.values())
+        processed = sum(r['processed_seconds'] for r in reports)
+        active = [r for r in reports if not r['done']]
+        speed = sum(r['speed'] for r in active)
+        percent = min(100.0, processed / self.duration * 100) if self.duration else None
+        remaining = max(0.0, self.duration - processed) if self.duration else None
+        return {
+            'percent': round(percent, 1) if percent is not None else None,
+            'processed_seconds': round(processed, 2),
+            'duration_seconds': self.duration,
+            'fps': round(sum(r['fps'] for r in active), 1),
+            'speed': round(speed, 2),
+            'eta_seconds': round(remaining / speed) if remaining is not None and speed else None,
+        }
@@ -0,0 +1,159 @@
+import math
+import os
+import socket
+import threading
+import time
+import logging
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Lower rank is claimed first. Backfill runs niced and with fewer threads.
+PRIORITY_CLASSES = {
+    'interactive': {'rank': 0, 'nice': 0, 'thread_share': 1.0},
+    'backfill': {'rank': 1, 'nice': 10, 'thread_share': 0.5},
+}
+DEFAULT_PRIORITY = 'interactive'
+
+class PlaybackMeter:
+    """
+    Sliding-window rate of segment requests served by this process.
+
+    The rate is published to the ``playback_load`` collection every
+    ``publish_interval`` seconds so that workers on other pods can see it.
+    """
+
+    def __init__(self, db, window: int = 30, publish_interval: int = 10):
+        self.collection = db.playback_load
+        self.window = window
+        self.publish_interval = publish_interval
+        self.host = f'{socket.gethostname()}:{os.getpid()}'
+        self._hits = deque()
+        self._last_publish = 0.0
+        self._lock = threading.Lock()
+
+    def record(self):
+        now = time.monotonic()
+        with self._lock:
+            self._hits.append(now)
+            publish = now - self._last_publish >= self.publish_interval
+            if publish:
+                self._last_publish = now
+        if publish:
+            self.publish()
+
+    def rate(self) -> float:
+        now = time.monotonic()
+        with self._lock:
+            while self._hits and self._hits[0] < now - self.window:
+                self._hits.popleft()
+            return len(self._hits) / self.window
+
+    def publish(self):
+        try:
+            self.collection.update_one(
+                {'_id': self.host},
+                {'$set': {'rate': self.rate(), 'updated_at': datetime.now(timezone.utc)}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f'Unable to publish playback load: {str(e)}')
+
+class Scheduler:
+    """
+    Decide which priority classes a worker may claim and how much CPU a
+    job gets.
+
+    The CPU budget is counted in encoder threads. Every running job
+    reserves ``threads x encoders`` (one x264 encoder per encoded
+    rendition), times the parallel processes of a chunked encode; backfill
+    jobs get a share of ``FFMPEG_THREADS`` and a nice level. Backfill is paused manually (``transcode_settings``)
+    or while the cluster serves more than ``pause_playback_rps`` segment
+    requests per second.
+    """
+
+    def __init__(self, db, cpu_budget: float, ffmpeg_threads: int, pause_playback_rps: float = 0,
+                 settings_ttl: float = 5, encoders: int = 1):
+        self.db = db
+        self.cpu_budget = max(1, math.floor(cpu_budget))
+        self.ffmpeg_threads = ffmpeg_threads
+        self.encoders = max(1, encoders)
+        self.pause_playback_rps = pause_playback_rps
+        self.settings_ttl = settings_ttl
+        self._cached = None
+        self._cached_at = 0.0
+
+    def threads_for(self, priority: str) -> int:
+        share = PRIORITY_CLASSES.get(priority, PRIORITY_CLASSES[DEFAULT_PRIORITY])['thread_share']
+        return max(1, int(self.ffmpeg_threads * share))
+
+    def _state(self) -> Dict[str, Any]:
+        """Pause flag and cluster playback rate, cached for ``settings_ttl`` seconds"""
+        now = time.monotonic()
+        if self._cached is None or now - self._cached_at > self.settings_ttl:
+            settings = self.db.transcode_settings.find_one({'_id': 'scheduler'}) or {}
+            since = datetime.now(timezone.utc) - timedelta(seconds=60)
+            playback = sum(doc.get('rate', 0) for doc in self.db.playback_load.find({'updated_at': {'$gte': since}}))
+            self._cached = {'backfill_paused': bool(settings.get('backfill_paused')), 'playback_rps': playback}
+            self._cached_at = now
+        return self._cached
+
+    def backfill_paused(self) -> bool:
+        state = self._state()
+        if state['backfill_paused']:
+            return True
+        return bool(self.pause_playback_rps) and state['playback_rps'] > self.pause_playback_rps
+
+    def set_backfill_paused(self, paused: bool):
+        self.db.transcode_settings.update_one({'_id': 'scheduler'}, {'$set': {'backfill_paused': paused}}, upsert=True)
+        self._cached = None
+
+    def claimable(self, used_threads: int) -> List[str]:
+        """Priority classes, highest first, that fit in the remaining CPU budget"""
+        remaining = self.cpu_budget - used_threads
+        classes = []
+        for name, spec in sorted(PRIORITY_CLASSES.items(), key=lambda item: item[1]['rank']):
+            if self.threads_for(name) * self.encoders > remaining:
+                continue
+            if name == 'backfill':
+                try:
+                    if self.backfill_paused():
+                        continue
+                except Exception as e:
+                    logger.error(f'Unable to read scheduler state: {str(e)}')
+                    continue
+            classes.append(name)
+        return classes
+
+    def allocate(self, priority: str, used_threads: int, max_processes: int = 1) -> Dict[str, int]:
+        """
+        CPU allocation of a claimed job.
+
+        Returns:
+            Dict[str, int]: ffmpeg ``threads`` of every encoder and ``nice``
+            level, the number of parallel ffmpeg ``processes`` it may run
+            (chunked jobs) and the ``reserved`` threads to give back when it
+            finishes.
+        """
+        threads = self.threads_for(priority)
+        job_threads = threads * self.encoders
+        remaining = max(job_threads, self.cpu_budget - used_threads)
+        processes = max(1, min(max_processes, remaining // job_threads))
+        return {
+            'threads': threads,
+            'nice': PRIORITY_CLASSES.get(priority, PRIORITY_CLASSES[DEFAULT_PRIORITY])['nice'],
+            'processes': processes,
+            'reserved': job_threads * processes,
+        }
+
+    def status(self) -> Dict[str, Any]:
+        state = self._state()
+        return {
+            'cpu_budget': self.cpu_budget,
+            'backfill_paused': self.backfill_paused(),
+            'backfill_paused_manually': state['backfill_paused'],
+            'playback_rps': round(state['playback_rps'], 2),
+            'pause_playback_rps': self.pause_playback_rps,
+        }
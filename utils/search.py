@@ -0,0 +1,68 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.pagination import keyset_filter
+
+# Fields of the catalog text index and their relevance weights
+SEARCH_WEIGHTS = {'title': 10, 'cast': 4, 'genre': 2, 'description': 1}
+# Ranked by relevance when there is a search text, newest first otherwise
+RELEVANCE_SORT = [('score', -1), ('_id', -1)]
+RECENT_SORT = [('created_at', -1), ('_id', -1)]
+MAX_FACET_VALUES = 50
+
+def search_match(text: Optional[str] = None, genres: List[str] = None, years: List[int] = None,
+                 min_rating: Optional[float] = None, content_type: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Filter of a catalog search. Several genres or years match any of them.
+    """
+    match = {}
+    if text:
+        match['$text'] = {'$search': text}
+    if genres:
+        match['genre'] = {'$in': genres}
+    if years:
+        match['release_year'] = {'$in': years}
+    if min_rating is not None:
+        match['rating'] = {'$gte': min_rating}
+    if content_type:
+        match['type'] = content_type
+    return match
+
+def search_pipeline(match: Dict[str, Any], fields: List[str], sort: List[Tuple[str, int]],
+                    after: Optional[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """
+    One aggregation returning a page of results (``limit + 1`` items, so the
+    caller can tell whether there is a next page) together with the total
+    and the genre and year facet counts of everything ``match`` selects.
+    Only ``fields`` (and the text score) are carried past the match.
+    """
+    projection = {field: 1 for field in fields}
+    if '$text' in match:
+        projection['score'] = {'$meta': 'textScore'}
+    results = [{'$match': keyset_filter(sort, after)}] if after else []
+    results += [{'$sort': dict(sort)}, {'$limit': limit + 1}]
+    return [
+        {'$match': match},
+        {'$project': projection},
+        {'$facet': {
+            'results': results,
+            'total': [{'$count': 'count'}],
+            'genre': [
+                {'$unwind': '$genre'},
+                {'$group': {'_id': '$genre', 'count': {'$sum': 1}}},
+                {'$sort': {'count': -1, '_id': 1}},
+                {'$limit': MAX_FACET_VALUES},
+            ],
+            'release_year': [
+                {'$group': {'_id': '$release_year', 'count': {'$sum': 1}}},
+                {'$sort': {'_id': -1}},
+                {'$limit': MAX_FACET_VALUES},
+            ],
+        }},
+    ]
+
+def search_facets(row: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """Facet counts of a ``search_pipeline`` result as ``{facet: [{value, count}]}``"""
+    return {
+        facet: [{'value': bucket['_id'], 'count': bucket['count']} for bucket in row.get(facet, []) if bucket['_id'] is not None]
+        for facet in ('genre', 'release_year')
+    }
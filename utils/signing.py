@@ -0,0 +1,44 @@
+import base64
+import hashlib
+import hmac
+import time
+from typing import Optional
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+def _signature(secret: str, scope: str, expires: int) -> str:
+    message = f'{scope}\n{expires}'.encode('utf-8')
+    return _b64encode(hmac.new(secret.encode('utf-8'), message, hashlib.sha256).digest())
+
+def sign_scope(secret: str, scope: str, ttl: int, now: Optional[float] = None) -> str:
+    """
+    Create a playback token for every file under the directory ``scope``
+    (relative to the upload folder) that expires in ``ttl`` seconds.
+
+    The token is ``<scope>.<expires>.<signature>``, URL safe, so it can sit in
+    the path and relative segment URIs in a playlist inherit it.
+    """
+    expires = int((now or time.time()) + ttl)
+    scope = scope.strip('/')
+    return f"{_b64encode(scope.encode('utf-8'))}.{expires}.{_signature(secret, scope, expires)}"
+
+def verify_scope(secret: str, token: str, path: str, now: Optional[float] = None) -> bool:
+    """
+    Check a playback token for ``path`` without any I/O: the signature must
+    match, the token must not be expired and ``path`` must be inside its scope.
+    """
+    try:
+        encoded_scope, expires, signature = token.split('.')
+        scope = _b64decode(encoded_scope).decode('utf-8')
+        expires = int(expires)
+    except (ValueError, UnicodeDecodeError):
+        return False
+    if not hmac.compare_digest(signature, _signature(secret, scope, expires)):
+        return False
+    if expires < (now or time.time()):
+        return False
+    return path.startswith(scope + '/')
@@ -0,0 +1,235 @@
+import os
+import socket
+import threading
+import logging
+
+from models.job_model import TranscodeJob
+from utils.ffmpeg_runner import ProcessGroup, terminate_all
+
+logger = logging.getLogger(__name__)
+
+class BacklogFullError(Exception):
+    pass
+
+class TranscodePool:
+    """
+    Fixed-size pool of worker threads running jobs from a ``JobQueue``.
+
+    Each worker claims one job at a time; the job itself spawns ffmpeg, so the
+    number of workers is the number of concurrent ffmpeg processes on this
+    replica. Jobs live in MongoDB, so they survive restarts and can be
+    picked up by any replica or by the standalone ``worker.py`` entrypoint.
+
+    With a ``Scheduler`` a worker only claims jobs whose priority class fits
+    in the CPU budget left by the jobs already running here, and the job is
+    handed an ``allocation`` (threads, nice level, parallel processes). A
+    claim reserves one ffmpeg process; a job that turns out to be chunked
+    asks for more with ``expand``.
+    """
+
+    def __init__(self, job_queue, workers: int, max_backlog: int, poll_interval: float = 5, scheduler=None):
+        self.jobs = job_queue
+        self.workers = workers
+        self.max_backlog = max_backlog
+        self.poll_interval = poll_interval
+        self.scheduler = scheduler
+        self._handlers = {}
+        self._threads = []
+        self._active = 0
+        self._used_threads = 0
+        self._lock = threading.Lock()
+        self._claim_lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+
+    def register(self, kind: str, handler, on_failure=None, on_complete=None):
+        """
+        Register the function that runs jobs of ``kind``.
+
+        Args:
+            kind (str): Job kind, e.g. ``'transcode'``.
+            handler (Callable[[dict, Callable[[dict], None]], dict]): Runs the
+                job and returns its result. The second argument publishes
+                progress for the job.
+            on_failure (Callable[[dict], None]): Called once a job has failed
+                for the last time.
+            on_complete (Callable[[dict, dict], None]): Called with the job
+                and its result once the job is marked completed.
+        """
+        self._handlers[kind] = (handler, on_failure, on_complete)
+
+    def start(self):
+        """Start the worker threads if they are not running yet"""
+        with self._lock:
+            if self._threads or self._stopping.is_set():
+                return
+            for index in range(self.workers):
+                worker_id = f'{socket.gethostname()}:{os.getpid()}:{index}'
+                thread = threading.Thread(target=self._worker, args=(worker_id,), name=f'transcode-worker-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f'Started transcode pool with {self.workers} workers')
+
+    def is_full(self) -> bool:
+        return self.jobs.backlog() >= self.max_backlog
+
+    def submit(self, job: TranscodeJob, check_backlog: bool = True) -> str:
+        """
+        Persist a job and wake up an idle worker.
+
+        Raises:
+            BacklogFullError: If ``check_backlog`` is set and ``max_backlog``
+                jobs are already queued.
+        """
+        if check_backlog and self.is_full():
+            raise BacklogFullError(f'Transcode backlog is full ({self.max_backlog} jobs)')
+        job_uuid = self.jobs.enqueue(job)
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_uuid
+
+    def info(self) -> dict:
+        info = {
+            'workers': self.workers,
+            'active': self._active,
+            'backlog': self.jobs.backlog(),
+            'max_backlog': self.max_backlog,
+        }
+        if self.scheduler is not None:
+            info['scheduler'] = dict(self.scheduler.status(), used_threads=self._used_threads)
+        return info
+
+    def shutdown(self, wait: bool = True, timeout: float = None):
+        """
+        Stop claiming jobs and stop the workers.
+
+        Args:
+            wait (bool): Let running jobs finish. When False, running ffmpeg
+                processes are terminated and their jobs released back to the
+                queue for another worker.
+            timeout (float): Maximum seconds to wait for each worker.
+        """
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        if not wait:
+            terminate_all()
+        for thread in list(self._threads):
+            thread.join(timeout)
+
+    def _worker(self, worker_id):
+        while not self._stopping.is_set():
+            try:
+                for job in self.jobs.reap_expired():
+                    self._on_failure(job)
+                job = self._claim(worker_id)
+            except Exception as e:
+                logger.error(f'Unable to claim transcode job: {str(e)}')
+                job = None
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval)
+                continue
+            self._run(job, worker_id)
+
+    def _claim(self, worker_id):
+        if self.scheduler is None:
+            return self.jobs.claim(worker_id)
+        # One claim at a time per replica so the budget check stays accurate
+        with self._claim_lock:
+            priorities = self.scheduler.claimable(self._used_threads)
+            if not priorities:
+                return None
+            job = self.jobs.claim(worker_id, priorities)
+            if job is None:
+                return None
+            with self._lock:
+                job['allocation'] = self.scheduler.allocate(job.get('priority'), self._used_threads)
+                self._used_threads += job['allocation']['reserved']
+            return job
+
+    def expand(self, job, max_processes: int) -> int:
+        """
+        Grow the allocation of a running job to up to ``max_processes``
+        parallel ffmpeg processes, within the CPU budget left by the other
+        jobs on this replica. Called once a job knows it will be chunked.
+
+        Returns:
+            int: The number of processes the job may run.
+        """
+        allocation = job.get('allocation')
+        if self.scheduler is None or allocation is None:
+            return max_processes
+        with self._claim_lock, self._lock:
+            others = self._used_threads - allocation['reserved']
+            job['allocation'] = self.scheduler.allocate(job.get('priority'), others, max_processes)
+            self._used_threads = others + job['allocation']['reserved']
+        return job['allocation']['processes']
+
+    def _run(self, job, worker_id):
+        handler, _, on_complete = self._handlers.get(job['kind'], (None, None, None))
+        done = threading.Event()
+        processes = ProcessGroup()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job['uuid'], worker_id, done, processes), daemon=True)
+        heartbeat.start()
+        with self._lock:
+            self._active += 1
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind {job['kind']}")
+            def report_progress(progress):
+                if not self.jobs.update_progress(job['uuid'], worker_id, progress):
+                    logger.warning(f"Lost lease on job {job['uuid']}, stopping its ffmpeg processes")
+                    processes.terminate()
+
+            with processes:
+                result = handler(job, report_progress)
+            if self.jobs.complete(job['uuid'], worker_id, result) and on_complete is not None:
+                self._on_complete(on_complete, job, result)
+        except Exception as e:
+            if self._stopping.is_set():
+                logger.warning(f"Releasing job {job['uuid']} on shutdown")
+                self.jobs.release(job['uuid'], worker_id)
+            else:
+                logger.error(f"Transcode job {job['uuid']} failed: {str(e)}")
+                failed = self.jobs.fail(job['uuid'], worker_id, str(e))
+                if failed is not None and failed['status'] == 'failed':
+                    self._on_failure(failed)
+        finally:
+            done.set()
+            with self._lock:
+                self._active -= 1
+                self._used_threads -= job.get('allocation', {}).get('reserved', 0)
+            if 'allocation' in job:
+                # Budget was freed, another worker may fit a job now
+                with self._wakeup:
+                    self._wakeup.notify()
+
+    def _heartbeat(self, job_uuid, worker_id, done, processes):
+        interval = max(1, self.jobs.lease_seconds / 3)
+        while not done.wait(interval):
+            try:
+                if not self.jobs.heartbeat(job_uuid, worker_id):
+                    # The job may be retried elsewhere; stop writing into its output
+                    logger.warning(f'Lost lease on job {job_uuid}, stopping its ffmpeg processes')
+                    processes.terminate()
+                    return
+            except Exception as e:
+                logger.error(f'Heartbeat failed for job {job_uuid}: {str(e)}')
+
+    def _on_failure(self, job):
+        _, on_failure, _ = self._handlers.get(job['kind'], (None, None, None))
+        if on_failure is None:
+            return
+        try:
+            on_failure(job)
+        except Exception as e:
+            logger.error(f"Failure callback for job {job['uuid']} raised: {str(e)}")
+
+    def _on_complete(self, on_complete, job, result):
+        try:
+            on_complete(job, result)
+        except Exception as e:
+            logger.error(f"Completion callback for job {job['uuid']} raised: {str(e)}")
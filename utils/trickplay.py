@@ -0,0 +1,107 @@
+import math
+import os
+import shutil
+from typing import Any, Dict, List, Optional
+
+TRICKPLAY_DIR = 'trickplay'
+TRICKPLAY_VTT = 'thumbnails.vtt'
+SPRITE_PATTERN = 'sprite_%04d.jpg'
+
+def trickplay_settings(interval: int, width: int, columns: int, rows: int,
+                       source_width: int, source_height: int) -> Optional[Dict[str, Any]]:
+    """
+    Size the thumbnails of a source. Returns None when trickplay is disabled
+    (``interval`` of 0).
+    """
+    if not interval:
+        return None
+    width = min(width, source_width) // 2 * 2
+    height = max(2, int(round(width * source_height / source_width / 2)) * 2)
+    return {'interval': interval, 'width': width, 'height': height, 'columns': columns, 'rows': rows}
+
+def trickplay_filter(settings: Dict[str, Any]) -> str:
+    """Filter chain that turns decoded frames into tiled sprite sheets"""
+    return (
+        f"fps=1/{settings['interval']},"
+        f"scale={settings['width']}:{settings['height']},"
+        f"tile={settings['columns']}x{settings['rows']}"
+    )
+
+def trickplay_output_args(output_dir: str, label: str) -> List[str]:
+    """Output options writing the ``label`` filter output as JPEG sheets"""
+    return [
+        '-map', f'[{label}]',
+        '-c:v', 'mjpeg',
+        '-q:v', '5',
+        '-f', 'image2',
+        '-start_number', '0',
+        os.path.join(output_dir, TRICKPLAY_DIR, SPRITE_PATTERN),
+    ]
+
+def _timestamp(seconds: float) -> str:
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f'{int(hours):02d}:{int(minutes):02d}:{seconds:06.3f}'
+
+def _sheets(directory: str) -> List[str]:
+    if not os.path.isdir(directory):
+        return []
+    return sorted(f for f in os.listdir(directory) if f.startswith('sprite_') and f.endswith('.jpg'))
+
+def write_trickplay_vtt(output_dir: str, settings: Dict[str, Any], spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Write the WebVTT thumbnail track for the sprite sheets in
+    ``output_dir/trickplay``. Every cue points at one tile with a media
+    fragment, e.g. ``sprite_0000.jpg#xywh=160,0,160,90``.
+
+    Args:
+        spans (List[Dict[str, Any]]): Consecutive time ranges with their
+            ``start``, ``end`` and the ``sheets`` rendered for that range. A
+            single-pass transcode has one span; chunked transcodes have one
+            per chunk.
+
+    Returns:
+        Dict[str, Any]: Trickplay details stored on the catalog entry.
+    """
+    per_sheet = settings['columns'] * settings['rows']
+    lines = ['WEBVTT', '']
+    sheets = []
+    for span in spans:
+        sheets.extend(span['sheets'])
+        count = min(math.ceil((span['end'] - span['start']) / settings['interval']), len(span['sheets']) * per_sheet)
+        for index in range(count):
+            start = span['start'] + index * settings['interval']
+            end = min(start + settings['interval'], span['end'])
+            tile = index % per_sheet
+            x = tile % settings['columns'] * settings['width']
+            y = tile // settings['columns'] * settings['height']
+            lines.append(f'{_timestamp(start)} --> {_timestamp(end)}')
+            lines.append(f"{span['sheets'][index // per_sheet]}#xywh={x},{y},{settings['width']},{settings['height']}")
+            lines.append('')
+
+    vtt_path = os.path.join(output_dir, TRICKPLAY_DIR, TRICKPLAY_VTT)
+    with open(vtt_path, 'w') as f:
+        f.write('\n'.join(lines))
+    return dict(settings, vtt_path=vtt_path, sheets=len(sheets))
+
+def trickplay_spans(output_dir: str, duration: float) -> List[Dict[str, Any]]:
+    """Span of a single-pass transcode"""
+    return [{'start': 0.0, 'end': duration, 'sheets': _sheets(os.path.join(output_dir, TRICKPLAY_DIR))}]
+
+def collect_chunk_sheets(chunk_dirs: List[str], chunks: List[Dict[str, Any]], output_dir: str) -> List[Dict[str, Any]]:
+    """
+    Move the sprite sheets of every chunk into ``output_dir/trickplay``,
+    prefixed with the chunk number, and return one span per chunk.
+    """
+    target_dir = os.path.join(output_dir, TRICKPLAY_DIR)
+    os.makedirs(target_dir, exist_ok=True)
+    spans = []
+    for index, (chunk_dir, chunk) in enumerate(zip(chunk_dirs, chunks)):
+        source_dir = os.path.join(chunk_dir, TRICKPLAY_DIR)
+        sheets = []
+        for sheet in _sheets(source_dir):
+            target = f'sprite_{index:04d}_{sheet[len("sprite_"):]}'
+            shutil.move(os.path.join(source_dir, sheet), os.path.join(target_dir, target))
+            sheets.append(target)
+        spans.append({'start': chunk['start'], 'end': chunk['end'], 'sheets': sheets})
+    return spans
@@ -0,0 +1,77 @@
+import fcntl
+import hashlib
+import os
+
+CHUNK_SIZE = 1024 * 1024
+CHECKSUM_ALGORITHMS = {'sha256', 'sha1', 'md5'}
+
+class UploadLimitError(Exception):
+    pass
+
+class UploadOffsetError(Exception):
+    """The chunk does not start at the end of the file, or another chunk is being appended"""
+
+    def __init__(self, message: str, offset: int):
+        super().__init__(message)
+        self.offset = offset
+
+def append_chunk(path: str, stream, offset: int, limit: int, chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    Append a request body to ``path`` as it arrives, without buffering it
+    in memory or in a temporary file. The file is locked while the chunk is
+    written, so two requests for the same offset cannot both append.
+
+    Args:
+        path (str): Partial upload file.
+        stream: File-like request body.
+        offset (int): Size of the file before this chunk.
+        limit (int): Maximum size of the whole upload in bytes.
+
+    Returns:
+        int: New size of the file.
+
+    Raises:
+        UploadOffsetError: If the file is not ``offset`` bytes long or
+            another request is appending to it.
+        UploadLimitError: If the chunk would grow the file past ``limit``;
+            the bytes of this chunk are discarded.
+    """
+    written = 0
+    with open(path, 'ab') as f:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadOffsetError('Another chunk is being appended', os.fstat(f.fileno()).st_size)
+        current = os.fstat(f.fileno()).st_size
+        if current != offset:
+            raise UploadOffsetError('Offset mismatch', current)
+        try:
+            while True:
+                data = stream.read(chunk_size)
+                if not data:
+                    break
+                written += len(data)
+                if offset + written > limit:
+                    raise UploadLimitError(f'Upload exceeds {limit} bytes')
+                f.write(data)
+        except Exception:
+            f.truncate(offset)
+            raise
+        f.flush()
+        os.fsync(f.fileno())
+    return offset + written
+
+def parse_checksum(value: str):
+    """Split ``sha256:<hex>`` into its algorithm and digest"""
+    algorithm, _, digest = value.partition(':')
+    algorithm = algorithm.lower()
+    if algorithm not in CHECKSUM_ALGORITHMS or not digest:
+        raise ValueError(f'Unsupported checksum: {value}')
+    return algorithm, digest.lower()
+
+def file_checksum(path: str, algorithm: str, chunk_size: int = CHUNK_SIZE) -> str:
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(chunk_size), b''):
+            digest.update(data)
+    return digest.hexdigest()
@@ -0,0 +1,24 @@
+import signal
+import threading
+import logging
+
+from app import app
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    """Run the transcode pool without serving HTTP"""
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    pool = app.config['transcode_pool']
+    pool.start()
+    logger.info('Transcode worker started')
+    stop.wait()
+    logger.info('Transcode worker stopping, releasing running jobs')
+    pool.shutdown(wait=False)
+
+if __name__ == '__main__':
+    main()